@@ -0,0 +1,26 @@
+"""last_seen_de_sesiones
+
+Revision ID: 0b7e4f3a9c21
+Revises: f2a9d6c1e384
+Create Date: 2026-10-18 16:03:51.602714
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4f3a9c21'
+down_revision: Union[str, None] = 'f2a9d6c1e384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_sessions', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_sessions', 'last_seen_at')
@@ -0,0 +1,34 @@
+"""contadores_rate_limit
+
+Revision ID: 1c5d8e2f7a43
+Revises: 0b7e4f3a9c21
+Create Date: 2026-10-18 16:48:12.305719
+
+Tabla UNLOGGED: los contadores son efímeros y no merecen escribir WAL.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c5d8e2f7a43'
+down_revision: Union[str, None] = '0b7e4f3a9c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_counters (
+            key VARCHAR(255) NOT NULL,
+            window_start BIGINT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            CONSTRAINT rate_limit_counters_pkey PRIMARY KEY (key, window_start)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,35 @@
+"""email_unico_sin_mayusculas
+
+Revision ID: 5e9a3c7b2d18
+Revises: 1c5d8e2f7a43
+Create Date: 2026-10-18 20:02:37.114502
+
+Sustituye el índice único sobre email por uno funcional sobre lower(email).
+Falla si ya hay emails que solo difieren en mayúsculas: hay que resolverlos a mano.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a3c7b2d18'
+down_revision: Union[str, None] = '1c5d8e2f7a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 20"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(f"Emails duplicados sin distinguir mayúsculas: {', '.join(duplicates)}")
+    op.create_index('uq_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    op.drop_index('ix_users_email', table_name='users')
+
+
+def downgrade() -> None:
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.drop_index('uq_users_email_lower', table_name='users')
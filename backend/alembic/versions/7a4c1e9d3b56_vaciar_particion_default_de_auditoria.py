@@ -0,0 +1,87 @@
+"""vaciar_particion_default_de_auditoria
+
+Revision ID: 7a4c1e9d3b56
+Revises: 5e9a3c7b2d18
+Create Date: 2026-10-18 21:14:52.308117
+
+audit_logs_create_partition pasa a mover las filas del mes que hayan caído en
+audit_logs_default antes de crear su partición. Antes, con filas de ese mes en
+DEFAULT, CREATE TABLE ... PARTITION OF fallaba y el mantenimiento se quedaba
+atascado. La partición se crea suelta, recibe las filas y se adjunta (ATTACH)
+una vez DEFAULT ya no tiene filas de su rango.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c1e9d3b56'
+down_revision: Union[str, None] = '5e9a3c7b2d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_logs_create_partition(month_start DATE) RETURNS TEXT AS $$
+        DECLARE
+            start_date DATE := date_trunc('month', month_start)::date;
+            end_date DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+            partition_name TEXT := format('audit_logs_y%sm%s', to_char(start_date, 'YYYY'), to_char(start_date, 'MM'));
+        BEGIN
+            -- Serializa la creación entre workers concurrentes
+            PERFORM pg_advisory_xact_lock(hashtext('audit_logs_create_partition'));
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                RETURN partition_name;
+            END IF;
+            IF to_regclass('audit_logs_default') IS NOT NULL AND EXISTS (
+                SELECT 1 FROM audit_logs_default WHERE created_at >= start_date AND created_at < end_date
+            ) THEN
+                -- Filas del mes en DEFAULT: se mueven a la partición antes de adjuntarla
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM audit_logs_default WHERE created_at >= %L AND created_at < %L '
+                    'RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                    start_date, end_date, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE audit_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, start_date, end_date
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, start_date, end_date
+                );
+            END IF;
+            RETURN partition_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_logs_create_partition(month_start DATE) RETURNS TEXT AS $$
+        DECLARE
+            start_date DATE := date_trunc('month', month_start)::date;
+            end_date DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+            partition_name TEXT := format('audit_logs_y%sm%s', to_char(start_date, 'YYYY'), to_char(start_date, 'MM'));
+        BEGIN
+            -- Serializa la creación entre workers concurrentes
+            PERFORM pg_advisory_xact_lock(hashtext('audit_logs_create_partition'));
+            IF to_regclass(partition_name) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, start_date, end_date
+                );
+            END IF;
+            RETURN partition_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
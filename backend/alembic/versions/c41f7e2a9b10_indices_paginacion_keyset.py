@@ -0,0 +1,28 @@
+"""indices_paginacion_keyset
+
+Revision ID: c41f7e2a9b10
+Revises: 9c9981a2d165
+Create Date: 2026-10-18 10:12:31.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7e2a9b10'
+down_revision: Union[str, None] = '9c9981a2d165'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_user_sessions_user_id_id', 'user_sessions', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_sessions_user_id_id', table_name='user_sessions')
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs')
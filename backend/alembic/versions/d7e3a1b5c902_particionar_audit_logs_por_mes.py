@@ -0,0 +1,127 @@
+"""particionar_audit_logs_por_mes
+
+Revision ID: d7e3a1b5c902
+Revises: c41f7e2a9b10
+Create Date: 2026-10-18 11:40:05.117320
+
+Convierte audit_logs en una tabla particionada por rango mensual de created_at.
+La clave primaria pasa a ser (id, created_at), requisito de PostgreSQL para
+tablas particionadas. Las particiones se crean con la función
+audit_logs_create_partition(date), que también usa app.db.audit_partitions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3a1b5c902'
+down_revision: Union[str, None] = 'c41f7e2a9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_old")
+    op.execute("ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_pkey TO audit_logs_old_pkey")
+    op.execute("ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_user_id_fkey TO audit_logs_old_user_id_fkey")
+    op.drop_index('ix_audit_logs_id', table_name='audit_logs_old')
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs_old')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'::regclass),
+            user_id INTEGER NOT NULL,
+            action VARCHAR(50) NOT NULL,
+            entity_name VARCHAR(100) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            old_values JSON,
+            new_values JSON,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(255),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT audit_logs_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_logs_create_partition(month_start DATE) RETURNS TEXT AS $$
+        DECLARE
+            start_date DATE := date_trunc('month', month_start)::date;
+            end_date DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+            partition_name TEXT := format('audit_logs_y%sm%s', to_char(start_date, 'YYYY'), to_char(start_date, 'MM'));
+        BEGIN
+            -- Serializa la creación entre workers concurrentes
+            PERFORM pg_advisory_xact_lock(hashtext('audit_logs_create_partition'));
+            IF to_regclass(partition_name) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, start_date, end_date
+                );
+            END IF;
+            RETURN partition_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Particiones para el histórico existente y los próximos meses
+    op.execute(f"""
+        SELECT audit_logs_create_partition(month_start::date)
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(created_at) FROM audit_logs_old), now())),
+            date_trunc('month', now()) + interval '{MONTHS_AHEAD} months',
+            interval '1 month'
+        ) AS month_start
+    """)
+    # Red de seguridad para filas fuera de rango; debe permanecer vacía
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, entity_name, entity_id, old_values,
+                                new_values, ip_address, user_agent, created_at)
+        SELECT id, user_id, action, entity_name, entity_id, old_values,
+               new_values, ip_address, user_agent, COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM audit_logs_old
+    """)
+    op.drop_table('audit_logs_old')
+
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'], unique=False)
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_entity', 'audit_logs', ['entity_name', 'entity_id', 'created_at'], unique=False)
+    op.create_index('ix_audit_logs_user_id_created_at', 'audit_logs', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_user_id_fkey TO audit_logs_partitioned_user_id_fkey")
+    op.drop_index('ix_audit_logs_id', table_name='audit_logs_partitioned')
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs_partitioned')
+    op.drop_index('ix_audit_logs_entity', table_name='audit_logs_partitioned')
+    op.drop_index('ix_audit_logs_user_id_created_at', table_name='audit_logs_partitioned')
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('audit_logs_id_seq'::regclass)"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('entity_name', sa.String(length=100), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('old_values', sa.JSON(), nullable=True),
+    sa.Column('new_values', sa.JSON(), nullable=True),
+    sa.Column('ip_address', sa.String(length=50), nullable=True),
+    sa.Column('user_agent', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_partitioned")
+    op.drop_table('audit_logs_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS audit_logs_create_partition(DATE)")
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'], unique=False)
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
@@ -0,0 +1,42 @@
+"""hash_refresh_tokens
+
+Revision ID: e5b2c8d4f617
+Revises: d7e3a1b5c902
+Create Date: 2026-10-18 14:05:47.520931
+
+Sustituye el refresh token completo por su SHA-256 (bytea de 32 bytes) como
+clave de búsqueda. Las filas existentes se rellenan con sha256() de PostgreSQL
+y la columna con el token en claro se elimina.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c8d4f617'
+down_revision: Union[str, None] = 'd7e3a1b5c902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_sessions', sa.Column('refresh_token_hash', sa.LargeBinary(length=32), nullable=True))
+    op.execute("UPDATE user_sessions SET refresh_token_hash = sha256(convert_to(refresh_token, 'UTF8'))")
+    op.alter_column('user_sessions', 'refresh_token_hash', nullable=False)
+    op.create_index('ix_user_sessions_refresh_token_hash', 'user_sessions', ['refresh_token_hash'], unique=True)
+    op.drop_index('ix_user_sessions_refresh_token', table_name='user_sessions')
+    op.drop_column('user_sessions', 'refresh_token')
+
+
+def downgrade() -> None:
+    # Los tokens en claro no se pueden recuperar: las sesiones quedan revocadas
+    op.add_column('user_sessions', sa.Column('refresh_token', sa.String(length=500), nullable=True))
+    op.execute(
+        "UPDATE user_sessions SET refresh_token = encode(refresh_token_hash, 'hex'), is_revoked = true"
+    )
+    op.alter_column('user_sessions', 'refresh_token', nullable=False)
+    op.create_index('ix_user_sessions_refresh_token', 'user_sessions', ['refresh_token'], unique=True)
+    op.drop_index('ix_user_sessions_refresh_token_hash', table_name='user_sessions')
+    op.drop_column('user_sessions', 'refresh_token_hash')
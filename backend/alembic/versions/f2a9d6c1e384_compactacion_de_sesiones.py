@@ -0,0 +1,44 @@
+"""compactacion_de_sesiones
+
+Revision ID: f2a9d6c1e384
+Revises: e5b2c8d4f617
+Create Date: 2026-10-18 15:22:09.834410
+
+Añade user_sessions.revoked_at y los índices que usan el listado de sesiones
+activas (parcial, WHERE NOT is_revoked) y la compactación periódica.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9d6c1e384'
+down_revision: Union[str, None] = 'e5b2c8d4f617'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_sessions', sa.Column('revoked_at', sa.DateTime(), nullable=True))
+    # Fecha desconocida: se toma la actual, así se conservan al menos un TTL de access token
+    op.execute("UPDATE user_sessions SET revoked_at = now() AT TIME ZONE 'utc' WHERE is_revoked")
+    op.create_index(
+        'ix_user_sessions_active_user_id_id', 'user_sessions', ['user_id', 'id'],
+        unique=False, postgresql_where=sa.text('NOT is_revoked'),
+    )
+    op.create_index('ix_user_sessions_expires_at', 'user_sessions', ['expires_at'], unique=False)
+    op.create_index(
+        'ix_user_sessions_revoked_at', 'user_sessions', ['revoked_at'],
+        unique=False, postgresql_where=sa.text('is_revoked'),
+    )
+    op.drop_index('ix_user_sessions_user_id_id', table_name='user_sessions')
+
+
+def downgrade() -> None:
+    op.create_index('ix_user_sessions_user_id_id', 'user_sessions', ['user_id', 'id'], unique=False)
+    op.drop_index('ix_user_sessions_revoked_at', table_name='user_sessions')
+    op.drop_index('ix_user_sessions_expires_at', table_name='user_sessions')
+    op.drop_index('ix_user_sessions_active_user_id_id', table_name='user_sessions')
+    op.drop_column('user_sessions', 'revoked_at')
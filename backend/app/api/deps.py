@@ -1,4 +1,4 @@
-from typing import Generator, List
+from typing import Generator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
@@ -6,52 +6,110 @@ from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.cache import Principal, principal_cache
+from app.core.database import get_db, run_db
+from app.core.permissions import Permission, permission_registry
+from app.core.revocation import revoked_sessions
+from app.core.security import decode_access_token
+from app.core.session_activity import session_activity
+from app.core.replicas import get_read_db
+from app.crud.user import get_principal, get_user
 from app.models.user import User
-from app.models.role import Role
 from app.schemas.token import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login/access-token")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    Valida el access token sin consultar la BD: firma, expiración y sesión no
+    revocada (conjunto en memoria). Anota además el uso de la sesión.
+    """
     try:
-        payload = jwt.decode(
-            token, settings.secret_key, algorithms=[settings.algorithm]
-        )
+        # La clave se elige por el kid de la cabecera
+        payload = decode_access_token(token)
         token_data = TokenPayload(**payload)
-    except (jwt.InvalidTokenError, ValidationError):
+        int(token_data.sub)
+        if token_data.type != "access":
+            # Refresh tokens y tokens sin tipo no dan acceso ni pasan por el conjunto de revocadas
+            raise ValueError("No es un access token")
+    except (jwt.InvalidTokenError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    if token_data.sid is not None and token_data.sid in revoked_sessions:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesión revocada",
+        )
+    if token_data.sid is not None and settings.session_last_seen_enabled:
+        session_activity.touch(token_data.sid)
+    return token_data
+
+async def get_current_principal(
+    token_data: TokenPayload = Depends(get_token_payload), db: Session = Depends(get_db, scope="function")
+) -> Principal:
+    """
+    Resuelve la identidad del token. Usa la caché de principals para no
+    consultar la BD en cada petición autenticada.
+    """
+    user_id = int(token_data.sub)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = await run_db(db, get_principal, user_id)
+        if not principal:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        principal_cache.set(user_id, principal)
+    return principal
+
+async def get_current_active_principal(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Usuario inactivo")
+    return principal
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db, scope="function")
+) -> User:
+    """Carga la entidad completa del usuario autenticado (perfil, edición)."""
+    user = await run_db(db, get_user, principal.id)
     if not user:
+        principal_cache.invalidate(principal.id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     return user
 
-def get_current_active_user(
+async def get_current_active_user(
+    principal: Principal = Depends(get_current_active_principal),
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
-class RoleChecker:
-    def __init__(self, allowed_roles: List[int]):
-        self.allowed_roles = allowed_roles
+class PermissionChecker:
+    """Exige un permiso del registro (máscara del rol, sin consultar la BD)."""
+
+    def __init__(self, permission: Permission):
+        self.permission = permission
 
-    def __call__(self, user: User = Depends(get_current_active_user)):
-        if user.role_id not in self.allowed_roles:
+    async def __call__(self, user: Principal = Depends(get_current_active_principal)):
+        if not permission_registry.has(user.role_id, self.permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes los permisos necesarios para realizar esta acción"
             )
         return user
 
-allow_admin = RoleChecker([1, 2])
-allow_super_admin = RoleChecker([1])
+allow_users_read = PermissionChecker(Permission.USERS_READ)
+allow_users_write = PermissionChecker(Permission.USERS_WRITE)
+allow_users_delete = PermissionChecker(Permission.USERS_DELETE)
+allow_audit_read = PermissionChecker(Permission.AUDIT_READ)
+allow_metrics_read = PermissionChecker(Permission.METRICS_READ)
+allow_sessions_revoke_any = PermissionChecker(Permission.SESSIONS_REVOKE_ANY)
@@ -0,0 +1,100 @@
+"""
+Serialización rápida de los listados.
+
+Los endpoints de listado consultan solo las columnas del schema de respuesta
+(filas `Row`, sin objetos ORM) y escriben el JSON directamente, sin que FastAPI
+valide cada objeto con `from_attributes` contra `response_model`:
+
+- con orjson instalado, las filas se vuelcan tal cual con `orjson.dumps`; las
+  columnas ya tienen los tipos del schema, así que no hace falta validarlas.
+- sin orjson, un `TypeAdapter` construido una sola vez valida y genera el JSON
+  en pydantic-core.
+
+Con `fields=id,first_name,...` (sparse fieldsets) solo se consultan y devuelven
+esas columnas, más las que necesita el cursor de paginación.
+
+El `response_model` de cada endpoint se mantiene para la documentación OpenAPI.
+"""
+from typing import Any, Generic, Sequence, TypeVar
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from app.schemas.pagination import Page
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+class ListSerializer(Generic[M]):
+    """Proyección de columnas y volcado a JSON de listados de `model`."""
+
+    def __init__(self, model: type[M]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self._list_adapter = TypeAdapter(list[model])
+        self._page_adapter = TypeAdapter(Page[model])
+
+    def parse_fields(self, fields: str | None) -> tuple[str, ...]:
+        """Campos pedidos en `fields` (separados por comas); todos si viene vacío."""
+        if not fields:
+            return self.fields
+        requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in self.model.model_fields]
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(self.fields)}",
+            )
+        return requested
+
+    def columns(self, entity: Any, fields: str | None = None, required: Sequence[str] = ()) -> list[Any]:
+        """
+        Columnas de `entity` (modelo ORM) que forman la respuesta: las de `fields`
+        o todas las del schema, más las de `required` (p. ej. las del cursor).
+        """
+        names = self.parse_fields(fields)
+        names += tuple(name for name in required if name not in names)
+        return [getattr(entity, name) for name in names]
+
+    @staticmethod
+    def _as_dicts(rows: Sequence[Any]) -> list[dict[str, Any]]:
+        if not rows:
+            return []
+        # zip con los nombres de la primera fila es varias veces más rápido que Row._asdict()
+        keys = rows[0]._fields
+        return [dict(zip(keys, row)) for row in rows]
+
+    def _is_partial(self, rows: Sequence[Any]) -> bool:
+        return bool(rows) and tuple(rows[0]._fields) != self.fields
+
+    def dump_list(self, rows: Sequence[Any]) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(self._as_dicts(rows))
+        if self._is_partial(rows):
+            # Un subconjunto de campos no valida contra el schema completo
+            return to_json(self._as_dicts(rows))
+        return self._list_adapter.dump_json(self._list_adapter.validate_python(rows, from_attributes=True))
+
+    def dump_page(self, rows: Sequence[Any], next_cursor: str | None) -> bytes:
+        if orjson is not None:
+            return orjson.dumps({"items": self._as_dicts(rows), "next_cursor": next_cursor})
+        if self._is_partial(rows):
+            return to_json({"items": self._as_dicts(rows), "next_cursor": next_cursor})
+        page = self._page_adapter.validate_python({"items": rows, "next_cursor": next_cursor}, from_attributes=True)
+        return self._page_adapter.dump_json(page)
+
+    def list_response(self, rows: Sequence[Any]) -> JSONBytesResponse:
+        return JSONBytesResponse(self.dump_list(rows))
+
+    def page_response(self, rows: Sequence[Any], next_cursor: str | None) -> JSONBytesResponse:
+        return JSONBytesResponse(self.dump_page(rows, next_cursor))
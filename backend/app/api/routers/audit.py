@@ -1,18 +1,126 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.api.deps import get_db, allow_super_admin
-from app.crud.audit import get_audit_logs
-from app.schemas.audit import AuditLogResponse
+from app.api.deps import get_read_db, allow_audit_read
+from app.api.fast_json import ListSerializer
+from app.core.config import settings
+from app.core.database import run_db
+from app.core.replicas import open_read_session, wants_primary
+from app.crud.audit import get_audit_logs, get_audit_logs_page, iter_audit_logs
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLogFilter, AuditLogResponse
+from app.schemas.pagination import Page
 
 router = APIRouter(
     prefix="/audit",
     tags=["Audit"],
 )
 
-@router.get("/", response_model=List[AuditLogResponse], dependencies=[Depends(allow_super_admin)])
-def read_audit_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+audit_list = ListSerializer(AuditLogResponse)
+
+EXPORT_COLUMNS = [column.name for column in AuditLog.__table__.columns]
+
+@router.get(
+    "/",
+    response_model=Union[List[AuditLogResponse], Page[AuditLogResponse]],
+    dependencies=[Depends(allow_audit_read)],
+)
+async def read_audit_logs(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: AuditLogFilter = Depends(),
+    db: Session = Depends(get_read_db),
+):
     """
     Obtener logs de auditoría (Solo Super Admin)
+
+    Admite filtros por usuario, acción, entidad, IP y rango de fechas.
+    Con `cursor` (vacío para la primera página) pagina por (created_at, id)
+    y responde `{items, next_cursor}`; sin él mantiene `skip`/`limit`.
+    `fields=id,action,created_at` limita las columnas leídas y devueltas
+    (con cursor se incluyen siempre `created_at` e `id`).
+    """
+    # old_values/new_values van directos de la columna JSON al cuerpo, sin revalidar
+    columns = audit_list.columns(AuditLog, fields, required=("created_at", "id") if cursor is not None else ())
+    if cursor is not None:
+        logs, next_cursor = await run_db(
+            db, get_audit_logs_page, cursor=cursor, limit=limit, filters=filters, columns=columns
+        )
+        return audit_list.page_response(logs, next_cursor)
+    logs = await run_db(db, get_audit_logs, skip=skip, limit=limit, filters=filters, columns=columns)
+    return audit_list.list_response(logs)
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def _ndjson_line(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=_json_default, ensure_ascii=False) + "\n"
+
+def _drain(buffer: io.StringIO) -> str:
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+def _csv_line(writer: Any, buffer: io.StringIO, row: Dict[str, Any]) -> str:
+    values = []
+    for name in EXPORT_COLUMNS:
+        value = row[name]
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(value)
+    writer.writerow(values)
+    return _drain(buffer)
+
+def _export_rows(filters: AuditLogFilter, export_format: str, force_primary: bool) -> Iterator[str]:
+    """
+    Genera el fichero por bloques de AUDIT_EXPORT_BATCH_SIZE filas. La sesión
+    se abre aquí y vive lo que dure la respuesta, no la dependencia.
+    """
+    batch_size = settings.audit_export_batch_size
+    writer = buffer = None
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield _drain(buffer)
+    chunk: List[str] = []
+    with open_read_session(force_primary=force_primary) as db:
+        for row in iter_audit_logs(db, filters, batch_size=batch_size):
+            chunk.append(_csv_line(writer, buffer, row) if writer else _ndjson_line(row))
+            if len(chunk) >= batch_size:
+                yield "".join(chunk)
+                chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+@router.get("/export", dependencies=[Depends(allow_audit_read)])
+async def export_audit_logs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: AuditLogFilter = Depends(),
+    x_read_consistency: Optional[str] = Header(default=None),
+):
+    """
+    Exportar logs de auditoría filtrados en NDJSON o CSV (Solo Super Admin)
+
+    La respuesta se transmite en streaming desde un cursor del servidor, con
+    memoria constante sea cual sea el número de filas.
     """
-    return get_audit_logs(db, skip=skip, limit=limit)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"audit_logs.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        _export_rows(filters, format, wants_primary(x_read_consistency)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
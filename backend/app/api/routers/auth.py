@@ -1,86 +1,113 @@
-from typing import Any, List
-from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.user import User
-from app.models.session import UserSession
-from app.core.security import verify_password, create_access_token, create_refresh_token
-from app.core.config import settings
-from app.schemas.token import Token, SessionResponse
+from app.core.database import get_db, run_db
+from app.core.cache import Principal
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token
+from app.core.hashing import password_hasher
+from app.core.rate_limit import rate_limiter
+from app.schemas.token import Token, SessionResponse, TokenPayload
+from app.schemas.pagination import Page
 from app.schemas.user import UserCreate, UserResponse
-from app.api.deps import get_current_active_user
-from app.crud.user import get_user_by_email, create_user
+from app.api.deps import get_current_active_principal, get_token_payload
+from app.api.fast_json import ListSerializer
+from app.models.session import UserSession
+from app.crud.user import get_user_by_email, create_user, update_password_hash
 from app.crud.audit import create_audit_log
+from app.crud.session import (
+    create_user_session,
+    rotate_refresh_token,
+    session_expiry,
+    get_active_sessions,
+    get_active_sessions_page,
+    revoke_user_session,
+    revoke_user_sessions,
+)
 
 router = APIRouter()
 
+session_list = ListSerializer(SessionResponse)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "0.0.0.0"
+
+
 @router.post("/register", response_model=UserResponse)
-def register(
+async def register(
     request: Request,
     user_in: UserCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ) -> Any:
     """
     Registro público de nuevos usuarios.
     """
-    user = get_user_by_email(db, email=user_in.email)
-    if user:
+    await rate_limiter.check_register(client_ip(request), user_in.email)
+
+    # REGLA DE NEGOCIO: Fuerza el rol a Visitante (5)
+    user_in.role_id = 5
+    
+    hashed_password = await password_hasher.hash(user_in.password)
+    # Un solo INSERT ... ON CONFLICT: sin consulta previa ni carrera entre registros
+    user = await run_db(db, create_user, user_in, hashed_password=hashed_password)
+    if user is None:
         raise HTTPException(
             status_code=400,
             detail="El email ya está registrado",
         )
     
-    # REGLA DE NEGOCIO: Fuerza el rol a Visitante (5)
-    user_in.role_id = 5
-    
-    user = create_user(db, user_in)
-    
     # Integrar Auditoría
-    create_audit_log(
+    await run_db(
         db,
+        create_audit_log,
         user_id=user.id, # El usuario se crea a sí mismo
         action="CREATE",
         entity_name="User",
         entity_id=user.id,
         new_values={"email": user.email, "role_id": user.role_id},
-        ip_address=request.client.host if request.client else "0.0.0.0",
+        ip_address=client_ip(request),
         user_agent=request.headers.get("user-agent")
     )
     
     return user
 
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(
+async def login_access_token(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Antes de tocar la BD o bcrypt: un ataque de fuerza bruta se corta aquí
+    await rate_limiter.check_login(client_ip(request), form_data.username)
+    user = await run_db(db, get_user_by_email, email=form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email o contraseña incorrectos",
         )
+    if new_hash:
+        # Hash con un coste de bcrypt anterior: se guarda el recalculado
+        await run_db(db, update_password_hash, user, new_hash)
     
-    access_token = create_access_token(subject=user.id)
     refresh_token = create_refresh_token(subject=user.id)
 
-    # Crear sesión de usuario
-    ip = request.client.host if request.client else "0.0.0.0"
-    user_session = UserSession(
+    # Crear sesión de usuario; su id viaja en el access token (claim sid)
+    session = await run_db(
+        db,
+        create_user_session,
         user_id=user.id,
         refresh_token=refresh_token,
-        ip_address=ip,
+        ip_address=client_ip(request),
         device_info=request.headers.get("user-agent"),
-        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
     )
-    db.add(user_session)
-    db.commit()
+    access_token = create_access_token(subject=user.id, session_id=session.id)
 
     return {
         "access_token": access_token,
@@ -89,62 +116,72 @@ def login_access_token(
     }
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
+async def refresh_token(
     refresh_token: str = Body(..., embed=True),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ) -> Any:
     """
     Refrescar el access token usando un refresh token válido.
+
+    El refresh token se rota: se devuelve uno nuevo y el anterior deja de
+    servir. La sesión se extiende REFRESH_TOKEN_EXPIRE_DAYS desde ahora.
     """
-    session = db.query(UserSession).filter(
-        UserSession.refresh_token == refresh_token,
-        UserSession.is_revoked == False,
-        UserSession.expires_at > datetime.now(timezone.utc)
-    ).first()
+    subject = decode_refresh_token(refresh_token)
+    rotated = None
+    if subject is not None:
+        new_refresh_token = create_refresh_token(subject=subject)
+        rotated = await run_db(db, rotate_refresh_token, refresh_token, new_refresh_token, session_expiry())
 
-    if not session:
+    if not rotated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token inválido o expirado",
         )
 
-    access_token = create_access_token(subject=session.user_id)
-    # Opcional: Rotación de refresh token (crear uno nuevo y revocar el anterior)
-    # Por ahora, mantenemos el mismo refresh token hasta que expire o se revoque.
-    
+    session_id, user_id = rotated
+    access_token = create_access_token(subject=user_id, session_id=session_id)
+
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "refresh_token": refresh_token,
+        "refresh_token": new_refresh_token,
     }
 
-@router.get("/sessions", response_model=List[SessionResponse])
-def get_user_sessions(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+@router.get("/sessions", response_model=Union[List[SessionResponse], Page[SessionResponse]])
+async def get_user_sessions(
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_principal),
+    db: Session = Depends(get_db, scope="function")
 ) -> Any:
     """
     Obtener todas las sesiones activas del usuario actual.
+
+    Con `cursor` (vacío para la primera página) responde páginas keyset
+    `{items, next_cursor}` de la más reciente a la más antigua.
+    `fields=id,device_info,last_seen_at` limita las columnas leídas y devueltas
+    (con cursor se incluye siempre `id`).
     """
-    sessions = db.query(UserSession).filter(
-        UserSession.user_id == current_user.id,
-        UserSession.is_revoked == False
-    ).all()
-    return sessions
+    columns = session_list.columns(UserSession, fields, required=("id",) if cursor is not None else ())
+    if cursor is not None:
+        sessions, next_cursor = await run_db(
+            db, get_active_sessions_page, current_user.id, cursor=cursor, limit=limit, columns=columns
+        )
+        return session_list.page_response(sessions, next_cursor)
+    sessions = await run_db(db, get_active_sessions, current_user.id, columns=columns)
+    return session_list.list_response(sessions)
 
 @router.delete("/sessions/{session_id}")
-def revoke_session(
+async def revoke_session(
     session_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_principal),
+    db: Session = Depends(get_db, scope="function")
 ) -> Any:
     """
     Revocar una sesión específica del usuario.
     """
-    session = db.query(UserSession).filter(
-        UserSession.id == session_id,
-        UserSession.user_id == current_user.id
-    ).first()
+    session = await run_db(db, revoke_user_session, session_id, current_user.id)
 
     if not session:
         raise HTTPException(
@@ -152,8 +189,19 @@ def revoke_session(
             detail="Sesión no encontrada",
         )
     
-    session.is_revoked = True
-    db.add(session)
-    db.commit()
-    
     return {"message": "Sesión revocada exitosamente"}
+
+@router.delete("/sessions")
+async def revoke_all_sessions(
+    keep_current: bool = False,
+    current_user: Principal = Depends(get_current_active_principal),
+    token_data: TokenPayload = Depends(get_token_payload),
+    db: Session = Depends(get_db, scope="function")
+) -> Any:
+    """
+    Cerrar todas las sesiones del usuario actual ("cerrar sesión en todas
+    partes"). Con `keep_current=true` se conserva la sesión de esta petición.
+    """
+    except_session_id = token_data.sid if keep_current else None
+    revoked = await run_db(db, revoke_user_sessions, current_user.id, except_session_id=except_session_id)
+    return {"message": "Sesiones revocadas exitosamente", "revoked": len(revoked)}
@@ -0,0 +1,65 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from app.api.deps import allow_metrics_read
+from app.core.cache import principal_cache
+from app.core.pool_metrics import pool_metrics
+from app.core.replicas import replica_router
+from app.core.audit_buffer import audit_buffer
+from app.core.revocation import revoked_sessions
+from app.core.session_activity import session_activity
+from app.core.rate_limit import rate_limiter
+from app.core.hashing import password_hasher
+from app.db import session_compaction
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(allow_metrics_read)],
+)
+
+@router.get("/cache")
+async def read_cache_metrics() -> Dict[str, Any]:
+    """
+    Aciertos y fallos de las cachés en memoria de este worker (Solo Super Admin)
+    """
+    return {"principal": principal_cache.stats(), "revoked_sessions": revoked_sessions.stats()}
+
+@router.get("/db-pool")
+async def read_db_pool_metrics() -> Dict[str, Any]:
+    """
+    Estado del pool de conexiones y tiempos de espera de este worker (Solo Super Admin)
+    """
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+@router.get("/replicas")
+async def read_replica_metrics() -> Dict[str, Any]:
+    """
+    Retraso de las réplicas y reparto de lecturas de este worker (Solo Super Admin)
+    """
+    return replica_router.stats()
+
+@router.get("/sessions")
+async def read_session_metrics() -> Dict[str, Any]:
+    """
+    Sesiones revocadas en memoria y última compactación de este worker (Solo Super Admin)
+    """
+    report = session_compaction.last_report
+    return {
+        "revoked_sessions": revoked_sessions.stats(),
+        "activity": session_activity.stats(),
+        "last_compaction": report.as_dict() if report else None,
+    }
+
+@router.get("/audit")
+async def read_audit_metrics() -> Dict[str, Any]:
+    """
+    Estado del buffer de auditoría de este worker (Solo Super Admin)
+    """
+    return audit_buffer.stats()
+
+@router.get("/rate-limit")
+async def read_rate_limit_metrics() -> Dict[str, Any]:
+    """
+    Intentos de login/registro rechazados y CPU de bcrypt ahorrada en este worker (Solo Super Admin)
+    """
+    return {"rate_limit": rate_limiter.stats(), "hashing": password_hasher.stats()}
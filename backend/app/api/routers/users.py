@@ -1,85 +1,123 @@
 """
 Router para la gestión de usuarios (Admin).
 """
-from typing import List
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import shutil
 from pathlib import Path
 import uuid
 
-from app.api.deps import get_db, get_current_active_user, allow_admin
+from app.core.database import run_db
+from app.api.fast_json import ListSerializer
+from app.api.deps import (
+    get_db,
+    get_read_db,
+    get_current_active_user,
+    get_current_active_principal,
+    allow_users_read,
+    allow_users_write,
+    allow_users_delete,
+    allow_sessions_revoke_any,
+)
+from app.core.permissions import permission_registry
 from app.crud.user import (
     get_user,
-    get_user_by_email,
     get_users,
+    get_users_page,
     create_user,
     update_user,
     delete_user as crud_delete_user,
     update_user_me,
+    update_profile_picture,
 )
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserUpdateMe
+from app.schemas.pagination import Page
 from app.models.user import User
+from app.core.cache import Principal
 from app.crud.audit import create_audit_log
+from app.crud.session import revoke_user_sessions
+from app.core.hashing import password_hasher
 
 router = APIRouter()
 
-@router.get("/", response_model=List[UserResponse], dependencies=[Depends(allow_admin)])
-def read_users(
+user_list = ListSerializer(UserResponse)
+
+def _save_upload(file: UploadFile, file_location: Path) -> None:
+    with open(file_location, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+@router.get("/", response_model=Union[List[UserResponse], Page[UserResponse]], dependencies=[Depends(allow_users_read)])
+async def read_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Obtiene la lista de usuarios.
+
+    Con `cursor` (vacío para la primera página) usa paginación keyset y
+    responde `{items, next_cursor}`; sin él mantiene `skip`/`limit`.
+    `fields=id,first_name,last_name` limita las columnas leídas y devueltas
+    (con cursor se incluye siempre `id`).
     """
-    users = get_users(db, current_user=current_user, skip=skip, limit=limit)
-    return users
+    # Solo las columnas pedidas de UserResponse, volcadas directamente a JSON
+    columns = user_list.columns(User, fields, required=("id",) if cursor is not None else ())
+    if cursor is not None:
+        users, next_cursor = await run_db(
+            db, get_users_page, current_user=current_user, cursor=cursor, limit=limit, columns=columns
+        )
+        return user_list.page_response(users, next_cursor)
+    users = await run_db(db, get_users, current_user=current_user, skip=skip, limit=limit, columns=columns)
+    return user_list.list_response(users)
 
-@router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(allow_admin)])
-def read_user(
+@router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(allow_users_read)])
+async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Obtiene un usuario por ID.
     """
-    db_user = get_user(db, user_id=user_id)
+    db_user = await run_db(db, get_user, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
         )
     return db_user
 
-@router.post("/", response_model=UserResponse, dependencies=[Depends(allow_admin)])
-def create_new_user(
+@router.post("/", response_model=UserResponse, dependencies=[Depends(allow_users_write)])
+async def create_new_user(
     request: Request,
     user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Crea un nuevo usuario.
     """
-    db_user = get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="El email ya está registrado"
-        )
-    
-    # REGLA DE NEGOCIO: Un Admin (2) no puede crear un Super Admin (1)
-    if current_user.role_id == 2 and user.role_id == 1:
+    # REGLA DE NEGOCIO: Solo se crean usuarios de nivel igual o inferior (un Admin no crea un Super Admin)
+    if not permission_registry.can_manage(current_user.role_id, user.role_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Un Admin no puede crear un Super Admin"
         )
         
-    new_user = create_user(db=db, user=user)
+    hashed_password = await password_hasher.hash(user.password)
+    new_user = await run_db(db, create_user, user=user, hashed_password=hashed_password)
+    if new_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="El email ya está registrado"
+        )
     
-    create_audit_log(
+    await run_db(
         db,
+        create_audit_log,
         user_id=current_user.id,
         action="CREATE",
         entity_name="User",
@@ -92,7 +130,7 @@ def create_new_user(
     return new_user
 
 @router.get("/me", response_model=UserResponse)
-def read_user_me(
+async def read_user_me(
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -101,10 +139,10 @@ def read_user_me(
     return current_user
 
 @router.put("/me", response_model=UserResponse)
-def update_user_profile(
+async def update_user_profile(
     request: Request,
     user_in: UserUpdateMe,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -120,10 +158,16 @@ def update_user_profile(
         "gender": current_user.gender,
     }
 
-    updated_user = update_user_me(db=db, db_user=current_user, user_in=user_in)
+    hashed_password = None
+    if user_in.password is not None:
+        hashed_password = await password_hasher.hash(user_in.password)
+    updated_user = await run_db(
+        db, update_user_me, db_user=current_user, user_in=user_in, hashed_password=hashed_password
+    )
 
-    create_audit_log(
+    await run_db(
         db,
+        create_audit_log,
         user_id=current_user.id,
         action="UPDATE",
         entity_name="User",
@@ -137,9 +181,9 @@ def update_user_profile(
     return updated_user
 
 @router.post("/me/profile-picture", response_model=UserResponse)
-def upload_profile_picture(
+async def upload_profile_picture(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -158,49 +202,44 @@ def upload_profile_picture(
     
     file_location = upload_dir / new_filename
 
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    await run_in_threadpool(_save_upload, file, file_location)
 
     # La URL se construye relativa a la raíz del servidor estático montado en /static
     # que apunta a uploads/. Por tanto, uploads/profile_pictures/x.jpg es accesible en /static/profile_pictures/x.jpg
     profile_picture_url = f"/static/profile_pictures/{new_filename}"
-    current_user.profile_picture = profile_picture_url
-    
-    db.commit()
-    db.refresh(current_user)
+    return await run_db(db, update_profile_picture, db_user=current_user, profile_picture=profile_picture_url)
 
-    return current_user
-
-@router.put("/{user_id}", response_model=UserResponse, dependencies=[Depends(allow_admin)])
-def update_existing_user(
+@router.put("/{user_id}", response_model=UserResponse, dependencies=[Depends(allow_users_write)])
+async def update_existing_user(
     request: Request,
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Actualiza un usuario existente.
     """
-    db_user = get_user(db, user_id=user_id)
+    db_user = await run_db(db, get_user, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
         )
     
-    # REGLA DE NEGOCIO: Si current_user.role_id == 2 y el usuario a editar tiene role_id == 1
-    # o se intenta enviar un role_id == 1, lanza 403.
-    if current_user.role_id == 2:
-        if db_user.role_id == 1:
-             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para modificar a un Super Admin"
-            )
-        if user_update.role_id == 1:
-             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para asignar el rol de Super Admin"
-            )
+    # REGLA DE NEGOCIO: No se edita a usuarios de nivel superior ni se asigna
+    # un rol de nivel superior al propio (un Admin no toca a un Super Admin).
+    if not permission_registry.can_manage(current_user.role_id, db_user.role_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para modificar a un Super Admin"
+        )
+    if user_update.role_id is not None and not permission_registry.can_manage(
+        current_user.role_id, user_update.role_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para asignar el rol de Super Admin"
+        )
 
     # Capture old values
     old_values = {
@@ -212,10 +251,16 @@ def update_existing_user(
         "is_active": db_user.is_active
     }
 
-    updated_user = update_user(db=db, db_user=db_user, update_data=user_update)
+    hashed_password = None
+    if user_update.password is not None:
+        hashed_password = await password_hasher.hash(user_update.password)
+    updated_user = await run_db(
+        db, update_user, db_user=db_user, update_data=user_update, hashed_password=hashed_password
+    )
 
-    create_audit_log(
+    await run_db(
         db,
+        create_audit_log,
         user_id=current_user.id,
         action="UPDATE",
         entity_name="User",
@@ -228,33 +273,34 @@ def update_existing_user(
     
     return updated_user
 
-@router.delete("/{user_id}", dependencies=[Depends(allow_admin)])
-def delete_user(
+@router.delete("/{user_id}", dependencies=[Depends(allow_users_delete)])
+async def delete_user(
     request: Request,
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_active_principal),
 ):
     """
     Realiza un borrado lógico (Soft Delete) de un usuario.
     """
-    db_user = get_user(db, user_id=user_id)
+    db_user = await run_db(db, get_user, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
         )
     
-    # REGLA DE NEGOCIO: Rol 2 no borra Rol 1
-    if current_user.role_id == 2 and db_user.role_id == 1:
+    # REGLA DE NEGOCIO: No se borra a usuarios de nivel superior (Rol 2 no borra Rol 1)
+    if not permission_registry.can_manage(current_user.role_id, db_user.role_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permiso para eliminar a un Super Admin"
         )
 
-    crud_delete_user(db, user_id=user_id)
+    await run_db(db, crud_delete_user, user_id=user_id)
 
-    create_audit_log(
+    await run_db(
         db,
+        create_audit_log,
         user_id=current_user.id,
         action="DELETE",
         entity_name="User",
@@ -264,3 +310,42 @@ def delete_user(
     )
 
     return {"message": "Usuario eliminado exitosamente"}
+
+@router.delete("/{user_id}/sessions", dependencies=[Depends(allow_sessions_revoke_any)])
+async def revoke_user_sessions_admin(
+    request: Request,
+    user_id: int,
+    db: Session = Depends(get_db, scope="function"),
+    current_user: Principal = Depends(get_current_active_principal),
+):
+    """
+    Revoca todas las sesiones activas de un usuario (p. ej. cuenta comprometida).
+    """
+    db_user = await run_db(db, get_user, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
+        )
+
+    # REGLA DE NEGOCIO: No se cierran sesiones de usuarios de nivel superior
+    if not permission_registry.can_manage(current_user.role_id, db_user.role_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para cerrar las sesiones de un Super Admin"
+        )
+
+    revoked = await run_db(db, revoke_user_sessions, user_id)
+
+    await run_db(
+        db,
+        create_audit_log,
+        user_id=current_user.id,
+        action="REVOKE_SESSIONS",
+        entity_name="User",
+        entity_id=user_id,
+        new_values={"revoked_sessions": len(revoked)},
+        ip_address=request.client.host,
+        user_agent=request.headers.get("user-agent")
+    )
+
+    return {"message": "Sesiones revocadas exitosamente", "revoked": len(revoked)}
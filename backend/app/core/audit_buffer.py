@@ -0,0 +1,183 @@
+"""
+Escritura de auditoría en lotes.
+
+En modo `AUDIT_WRITE_MODE=buffered` las entradas se encolan en memoria y un hilo
+las inserta en bloque (INSERT multi-fila) cuando se alcanza `AUDIT_BUFFER_FLUSH_SIZE`
+o cada `AUDIT_BUFFER_FLUSH_INTERVAL_SECONDS`. Al apagar la aplicación se vacía el
+buffer. Si el buffer está lleno o ya se ha detenido, la entrada se escribe en la
+transacción de quien llama.
+
+Si un lote falla se reintenta fila a fila: las válidas se escriben y las que
+fallan vuelven a la cola hasta `AUDIT_BUFFER_MAX_ATTEMPTS` intentos, tras los que
+se descartan registrando su contenido en el log. Con la BD caída
+(OperationalError) no se cuentan intentos. Lo que siga pendiente al detener el
+buffer también se registra en el log.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.periodic import PeriodicTask
+from app.models.audit import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    def __init__(
+        self,
+        flush_size: int,
+        flush_interval: float,
+        max_pending: int,
+        max_attempts: int = 3,
+        session_factory=SessionLocal,
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._rows: list[dict[str, Any]] = []
+        # Filas de lotes fallidos con sus intentos fallidos
+        self._retry: list[tuple[dict[str, Any], int]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: PeriodicTask | None = None
+        self._stopped = False
+        self.flushed_rows = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.failures = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self._stopped = False
+            if self._task is None:
+                self._task = PeriodicTask(
+                    "audit-buffer-flusher", self.flush_interval, self.flush, run_on_stop=True
+                )
+                self._task.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            task, self._task = self._task, None
+        if task is not None:
+            task.stop()
+        else:
+            self.flush()
+        with self._lock:
+            leftover = [row for row, _ in self._retry] + self._rows
+            self._rows, self._retry = [], []
+        if leftover:
+            self._drop(leftover, "pendientes al detener el buffer")
+
+    def enqueue(self, row: dict[str, Any]) -> bool:
+        """Encola una fila. Devuelve False si el buffer está lleno o detenido."""
+        if self._task is None and not self._stopped:
+            self.start()
+        with self._lock:
+            if self._stopped or len(self._rows) + len(self._retry) >= self.max_pending:
+                self.fallbacks += 1
+                return False
+            self._rows.append(row)
+            pending = len(self._rows)
+        if pending >= self.flush_size and self._task is not None:
+            self._task.wake()
+        return True
+
+    def add(self, row: dict[str, Any]) -> None:
+        """
+        Encola una fila o, si el buffer no la admite, la inserta en una
+        transacción propia. Se usa tras confirmar la transacción auditada, cuando
+        ya no se puede escribir en la de quien llama.
+        """
+        if not self.enqueue(row):
+            self._insert([row])
+
+    def _insert(self, rows: list[dict[str, Any]]) -> None:
+        with self.session_factory() as db:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+
+    def _drop(self, rows: list[dict[str, Any]], reason: str) -> None:
+        self.dropped += len(rows)
+        for row in rows:
+            # El contenido queda en el log para poder recuperarlo a mano
+            logger.error("Registro de auditoría descartado (%s): %s", reason, json.dumps(row, default=str))
+
+    def _insert_one_by_one(self, items: list[tuple[dict[str, Any], int]]) -> int:
+        """Reintenta fila a fila para aislar las que hacen fallar el lote."""
+        written = 0
+        requeue: list[tuple[dict[str, Any], int]] = []
+        for index, (row, attempts) in enumerate(items):
+            try:
+                self._insert([row])
+                written += 1
+            except OperationalError:
+                # BD no disponible: las filas no tienen la culpa, se reintentan sin contar
+                logger.exception("BD no disponible al escribir auditoría; %d filas vuelven a la cola", len(items) - index)
+                requeue.extend(items[index:])
+                break
+            except Exception:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    logger.exception("Registro de auditoría rechazado %d veces", attempts)
+                    self._drop([row], "rechazado por la BD")
+                else:
+                    requeue.append((row, attempts))
+        with self._lock:
+            self._retry = requeue + self._retry
+        return written
+
+    def flush(self) -> int:
+        """Inserta en bloque todo lo pendiente. Devuelve las filas escritas."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                retry, self._retry = self._retry, []
+            if not rows and not retry:
+                return 0
+            items = retry + [(row, 0) for row in rows]
+            start = time.perf_counter()
+            try:
+                self._insert([row for row, _ in items])
+            except Exception:
+                self.failures += 1
+                logger.exception("No se pudo escribir un lote de %d registros de auditoría", len(items))
+                written = self._insert_one_by_one(items)
+                self.flushed_rows += written
+                return written
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushed_rows += len(items)
+            self.batches += 1
+            return len(items)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": settings.audit_write_mode,
+            "pending": len(self._rows) + len(self._retry),
+            "flushed_rows": self.flushed_rows,
+            "batches": self.batches,
+            "fallbacks": self.fallbacks,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+audit_buffer = AuditBuffer(
+    flush_size=settings.audit_buffer_flush_size,
+    flush_interval=settings.audit_buffer_flush_interval_seconds,
+    max_pending=settings.audit_buffer_max_pending,
+    max_attempts=settings.audit_buffer_max_attempts,
+)
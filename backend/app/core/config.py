@@ -2,6 +2,7 @@
 Módulo de configuración central.
 Carga las variables de entorno utilizando Pydantic.
 """
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,11 +10,96 @@ class Settings(BaseSettings):
     project_name: str = "Sistema de Inventario API"
     version: str = "1.0.0"
     database_url: str
+    # Usa AsyncEngine/AsyncSession (requiere el driver postgresql+psycopg)
+    database_async: bool = False
+
+    # Pool de conexiones (por worker)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_use_lifo: bool = False
+
+    # Sentencias preparadas en el servidor (psycopg): se preparan tras
+    # DB_PREPARE_THRESHOLD ejecuciones; desactivar detrás de PgBouncer < 1.21
+    db_prepared_statements_enabled: bool = True
+    db_prepare_threshold: int = 5
+    db_prepared_max: int = 100
+    # Sentencias compiladas que SQLAlchemy guarda por engine
+    db_query_cache_size: int = 500
+
+    # Réplicas de lectura (lista JSON de URLs); vacía = todo al primario
+    database_replica_urls: list[str] = []
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 2.0
+
+    # Auditoría: "durable" escribe en la transacción de la petición,
+    # "buffered" encola en memoria e inserta en lotes
+    audit_write_mode: Literal["durable", "buffered"] = "durable"
+    audit_buffer_flush_size: int = 500
+    audit_buffer_flush_interval_seconds: float = 1.0
+    audit_buffer_max_pending: int = 10000
+    audit_buffer_max_attempts: int = 3
+
+    # Último uso de cada sesión, escrito en bloque cada N segundos
+    session_last_seen_enabled: bool = True
+    session_last_seen_flush_interval_seconds: float = 30.0
+
+    # Borrado periódico de sesiones caducadas o revocadas
+    session_compaction_enabled: bool = True
+    session_compaction_interval_seconds: float = 3600.0
+    session_compaction_batch_size: int = 1000
+    session_compaction_pause_seconds: float = 0.1
+
+    # Instrumentación SQL por petición (Server-Timing y avisos en el log)
+    sql_instrumentation_enabled: bool = True
+    sql_slow_query_ms: float = 200.0
+    sql_repeated_statement_threshold: int = 10
+
+    # Particiones mensuales de audit_logs
+    audit_partition_maintenance_enabled: bool = True
+    audit_partition_months_ahead: int = 3
+    audit_retention_months: int = 12
+    audit_export_batch_size: int = 1000
+
+    # Límite de intentos de login/registro por IP y por email, antes de bcrypt
+    rate_limit_enabled: bool = True
+    rate_limit_backend: Literal["memory", "postgres"] = "memory"
+    rate_limit_window_seconds: int = 60
+    rate_limit_email_window_seconds: int = 900
+    rate_limit_login_per_ip: int = 20
+    rate_limit_login_per_email: int = 10
+    rate_limit_register_per_ip: int = 5
+    rate_limit_register_per_email: int = 3
+    rate_limit_cleanup_interval_seconds: float = 300.0
     secret_key: str
     algorithm: str = "HS256"
+    # Claves asimétricas de los access tokens (vacío = HS256 con SECRET_KEY)
+    jwt_keys_dir: str = ""
+    jwt_active_kid: str = ""
+    # Una clave nueva no firma hasta pasado este tiempo (> max-age del JWKS, 300 s)
+    jwt_key_publish_delay_seconds: float = 600.0
     access_token_expire_minutes: int = 60
     refresh_token_expire_days: int = 7
 
+    # Pool de procesos para bcrypt (0 = número de CPUs)
+    hashing_workers: int = 0
+    hashing_max_queue: int = 64
+    # Coste de bcrypt: 0 = calibrar al arrancar para que un hash tarde ~BCRYPT_TARGET_MS
+    bcrypt_rounds: int = 0
+    bcrypt_target_ms: float = 250.0
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+
+    # Caché en memoria del usuario autenticado (0 = desactivada)
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 30.0
+
+    # Invalidación de cachés entre workers (LISTEN/NOTIFY)
+    cache_invalidation_enabled: bool = True
+    cache_invalidation_channel: str = "cache_invalidation"
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 settings = Settings()
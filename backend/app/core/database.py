@@ -1,18 +1,158 @@
 """
 Configuración de SQLAlchemy y conexión a PostgreSQL.
+
+Con `DATABASE_ASYNC=true` las peticiones usan un `AsyncSession` sobre el driver
+asíncrono de psycopg; si no, un `Session` síncrono ejecutado en el threadpool.
+La lógica CRUD es la misma en ambos modos: los routers la invocan con `run_db`.
+
+La sesión de cada petición es una unidad de trabajo: las funciones CRUD solo
+hacen flush (`commit_or_flush`) y `get_db` confirma una única vez al terminar
+el endpoint, o revierte si falla. Los efectos que dependen de la confirmación
+(p. ej. invalidar cachés locales) se registran con `after_commit`.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import logging
+from typing import Any, AsyncGenerator, Callable, Generator, TypeVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.pool_metrics import get_pool_metrics, timed_pool_class
+from app.core.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def configure_prepared_statements(engine: Any) -> None:
+    """
+    Ajusta en cada conexión psycopg nueva cuándo se prepara una sentencia en
+    el servidor. Las consultas calientes se construyen una sola vez, así que su
+    SQL es idéntico en cada ejecución y psycopg reutiliza la versión preparada.
+    """
 
-engine = create_engine(settings.database_url, echo=False)
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        connection = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        if settings.db_prepared_statements_enabled:
+            connection.prepare_threshold = settings.db_prepare_threshold
+            connection.prepared_max = settings.db_prepared_max
+        else:
+            connection.prepare_threshold = None
+
+def attach_engine(name: str, engine: Any) -> None:
+    """Métricas del pool e instrumentación SQL para `engine` (sync_engine en modo async)."""
+    get_pool_metrics(name).attach(engine)
+    if settings.sql_instrumentation_enabled:
+        instrument_engine(engine)
+    if engine.dialect.driver == "psycopg":
+        configure_prepared_statements(engine)
+
+def engine_options(name: str, async_mode: bool = False) -> dict[str, Any]:
+    """Parámetros del pool tomados de Settings, con métricas bajo `name`."""
+    return {
+        "echo": False,
+        "poolclass": timed_pool_class(get_pool_metrics(name), async_mode=async_mode),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_use_lifo": settings.db_pool_use_lifo,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+
+engine = create_engine(settings.database_url, **engine_options("primary"))
+attach_engine("primary", engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db() -> getattr(SessionLocal, "__class__"): # type: ignore
-    """Generador para obtener y cerrar de forma segura la sesión de BD."""
-    db = SessionLocal()
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    async_engine = create_async_engine(settings.database_url, **engine_options("primary_async", async_mode=True))
+    attach_engine("primary_async", async_engine.sync_engine)
+    # expire_on_commit=False: los objetos se serializan fuera del contexto greenlet
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Marca en Session.info de las sesiones de petición
+UNIT_OF_WORK = "unit_of_work"
+_AFTER_COMMIT = "after_commit_callbacks"
+
+def commit_or_flush(db: Session) -> None:
+    """
+    Dentro de una unidad de trabajo solo envía los cambios (flush); la
+    confirmación la hace `get_db`. Fuera de ella (scripts, seeds) confirma.
+    """
+    if db.info.get(UNIT_OF_WORK):
+        db.flush()
+    else:
+        db.commit()
+
+def after_commit(db: Session, callback: Callable[[], object]) -> None:
+    """Ejecuta `callback` cuando se confirme la transacción en curso de `db`."""
+    db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        # La transacción ya está confirmada: un fallo aquí no debe convertirse en
+        # un 500 (ni en un rollback) de un cambio que sí se guardó
+        try:
+            callback()
+        except Exception:
+            logger.exception("Falló un callback after_commit")
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT, None)
+
+def dialect_insert(db: Session, entity: Any):
+    """INSERT del dialecto de `db` (PostgreSQL o SQLite en tests), con ON CONFLICT."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert(entity)
+    return sqlite_insert(entity)
+
+def get_sync_db() -> Generator[Session, None, None]:
+    """
+    Sesión de la petición como unidad de trabajo: se confirma una sola vez al
+    terminar el endpoint y se revierte si lanza una excepción.
+
+    Debe declararse con `Depends(get_db, scope="function")` para que la
+    confirmación ocurra antes de enviar la respuesta y sus errores lleguen al
+    cliente.
+    """
+    db = SessionLocal(info={UNIT_OF_WORK: True})
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Versión asíncrona de `get_sync_db` (modo DATABASE_ASYNC)."""
+    async with AsyncSessionLocal(info={UNIT_OF_WORK: True}) as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+get_db = get_async_db if settings.database_async else get_sync_db
+
+async def run_db(db: Session | AsyncSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta una función CRUD síncrona `fn(session, ...)` sin bloquear el event loop.
+
+    - AsyncSession: `run_sync` la ejecuta sobre el driver asíncrono (greenlet).
+    - Session: se delega al threadpool de Starlette.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
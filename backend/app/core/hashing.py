@@ -0,0 +1,212 @@
+"""
+Ejecutor dedicado para el hashing de contraseñas (bcrypt).
+
+bcrypt es trabajo de CPU puro. Ejecutarlo dentro de los endpoints síncronos agota
+el threadpool de Starlette y bloquea el resto de rutas. Este módulo lo delega a un
+pool de procesos acotado, con una cola máxima que rechaza carga (503) en lugar de
+acumular peticiones.
+
+El coste de bcrypt se calibra al arrancar (`calibrate`): se elige el mayor número
+de rondas cuyo hash cabe en BCRYPT_TARGET_MS en esta máquina. Los hashes con un
+coste menor se rehacen de forma transparente en el siguiente login correcto.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HashingOverloadedError(Exception):
+    """Se lanza cuando la cola del ejecutor de hashing está llena."""
+
+
+def _hash_worker(password: str) -> str:
+    from app.core.security import pwd_context
+    return pwd_context.hash(password)
+
+
+def _verify_worker(plain_password: str, hashed_password: str) -> bool:
+    from app.core.security import pwd_context
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update_worker(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    from app.core.security import pwd_context
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return True, None
+
+
+def _init_worker(rounds: int | None) -> None:
+    if rounds is not None:
+        from app.core.security import configure_bcrypt_rounds
+        configure_bcrypt_rounds(rounds)
+
+
+def time_bcrypt(rounds: int, samples: int = 1) -> float:
+    """Milisegundos (el mejor de `samples`) de un hash bcrypt con `rounds` rondas."""
+    from passlib.hash import bcrypt
+    handler = bcrypt.using(rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibracion")
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> tuple[int, dict[int, float]]:
+    """
+    Mayor coste entre `min_rounds` y `max_rounds` cuyo hash no supera `target_ms`.
+    Cada ronda dobla el tiempo, así que se para sin medir el coste que ya se pasaría.
+    Devuelve (rondas, {rondas: ms medidos}).
+    """
+    timings: dict[int, float] = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        # La primera medida incluye el calentamiento; se toma la mejor de dos
+        timings[rounds] = time_bcrypt(rounds, samples=2 if rounds == min_rounds else 1)
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+        if timings[rounds] * 2 > target_ms:
+            break
+    return chosen, timings
+
+
+def _timed_worker(fn, *args):
+    """Ejecuta `fn` en el proceso hijo y devuelve también su tiempo de CPU."""
+    start = time.process_time()
+    result = fn(*args)
+    return result, time.process_time() - start
+
+
+class PasswordHasher:
+    """Pool de procesos acotado con API asíncrona para bcrypt."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.operations = 0
+        self.cpu_seconds = 0.0
+        self.rounds: int | None = None
+        self.rehashed = 0
+
+    def configure(self, rounds: int) -> None:
+        """Fija el coste de bcrypt en este proceso y en los procesos del pool (llamar antes de `start`)."""
+        from app.core.security import configure_bcrypt_rounds
+        configure_bcrypt_rounds(rounds)
+        self.rounds = rounds
+
+    def calibrate(self) -> int:
+        """Aplica BCRYPT_ROUNDS o, si es 0, el coste calibrado en esta máquina. Solo una vez por proceso."""
+        if self.rounds is None:
+            if settings.bcrypt_rounds:
+                self.configure(settings.bcrypt_rounds)
+            else:
+                rounds, timings = calibrate_bcrypt_rounds(
+                    settings.bcrypt_target_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds
+                )
+                self.configure(rounds)
+                logger.info(
+                    "Coste de bcrypt calibrado: %d rondas (%.0f ms, objetivo %.0f ms)",
+                    rounds, timings[rounds], settings.bcrypt_target_ms,
+                )
+        return self.rounds
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" evita heredar hilos y conexiones abiertas del worker de uvicorn.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.rounds,),
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HashingOverloadedError("Cola de hashing llena")
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _submit(self, fn, *args):
+        self._acquire()
+        try:
+            if self._executor is None:
+                self.start()
+            loop = asyncio.get_running_loop()
+            result, cpu_seconds = await loop.run_in_executor(self._executor, _timed_worker, fn, *args)
+        finally:
+            self._release()
+        with self._lock:
+            self.operations += 1
+            self.cpu_seconds += cpu_seconds
+        return result
+
+    @property
+    def avg_cpu_seconds(self) -> float:
+        """CPU media de un hash/verify de bcrypt medida en los workers."""
+        return self.cpu_seconds / self.operations if self.operations else 0.0
+
+    async def hash(self, password: str) -> str:
+        """Genera un hash de la contraseña fuera del event loop."""
+        return await self._submit(_hash_worker, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica la contraseña fuera del event loop."""
+        return await self._submit(_verify_worker, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifica la contraseña y, si es correcta y su hash tiene un coste anterior
+        (`needs_update`), devuelve también el hash nuevo para guardarlo.
+        """
+        valid, new_hash = await self._submit(_verify_and_update_worker, plain_password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict[str, int | float | None]:
+        return {
+            "bcrypt_rounds": self.rounds,
+            "rehashed": self.rehashed,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected,
+            "operations": self.operations,
+            "avg_cpu_ms": self.avg_cpu_seconds * 1000,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.hashing_workers or os.cpu_count() or 1,
+    max_queue=settings.hashing_max_queue,
+)
@@ -0,0 +1,147 @@
+"""
+Bus de invalidación de cachés entre workers sobre LISTEN/NOTIFY de PostgreSQL.
+
+La capa CRUD publica `<namespace>:<clave>[,<clave>...]` con `pg_notify` dentro de
+su propia transacción, de modo que el aviso solo sale si el cambio se confirma.
+Cada worker mantiene un hilo escuchando el canal y desaloja las claves en sus
+cachés locales a través de los handlers registrados por namespace.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Límite de PostgreSQL para el payload de NOTIFY es 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+
+@dataclass
+class _Handler:
+    evict: Callable[[str], None]
+    clear: Callable[[], None] | None = None
+
+
+_handlers: dict[str, _Handler] = {}
+
+
+def register_handler(
+    namespace: str,
+    evict: Callable[[str], None],
+    clear: Callable[[], None] | None = None,
+) -> None:
+    """
+    Registra cómo desalojar una clave de un namespace. `clear` se usa al
+    reconectar, cuando pudieron perderse avisos.
+    """
+    _handlers[namespace] = _Handler(evict=evict, clear=clear)
+
+
+def dispatch(payload: str) -> None:
+    """Aplica localmente un aviso recibido del canal."""
+    namespace, _, keys = payload.partition(":")
+    handler = _handlers.get(namespace)
+    if handler is None:
+        return
+    for key in keys.split(","):
+        if key:
+            handler.evict(key)
+
+
+def clear_all() -> None:
+    for handler in _handlers.values():
+        if handler.clear is not None:
+            handler.clear()
+
+
+def _payloads(namespace: str, keys: list[str]) -> list[str]:
+    payloads, current = [], []
+    size = len(namespace) + 1
+    for key in keys:
+        if current and size + len(key) + 1 > MAX_PAYLOAD_BYTES:
+            payloads.append(f"{namespace}:{','.join(current)}")
+            current, size = [], len(namespace) + 1
+        current.append(key)
+        size += len(key) + 1
+    if current:
+        payloads.append(f"{namespace}:{','.join(current)}")
+    return payloads
+
+
+def publish(db: Session, namespace: str, *keys) -> None:
+    """
+    Publica la invalidación en la transacción actual de `db`. Debe llamarse
+    antes del commit: PostgreSQL entrega el NOTIFY al confirmar.
+    """
+    if not settings.cache_invalidation_enabled or not keys:
+        return
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for payload in _payloads(namespace, [str(key) for key in keys]):
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.cache_invalidation_channel, "payload": payload},
+        )
+
+
+def _listener_dsn() -> str:
+    url = make_url(settings.database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class InvalidationListener(threading.Thread):
+    """Hilo que escucha el canal de invalidación y reconecta ante fallos."""
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 1.0):
+        super().__init__(name="cache-invalidation-listener", daemon=True)
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._stop_event = threading.Event()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop_event.set()
+        self.join(timeout)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{self.channel}"')
+                    # Pudimos perder avisos mientras no escuchábamos
+                    clear_all()
+                    while not self._stop_event.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            dispatch(notify.payload)
+            except Exception:
+                logger.exception("Listener de invalidación desconectado, reintentando")
+                clear_all()
+                self._stop_event.wait(self.reconnect_delay)
+
+
+_listener: InvalidationListener | None = None
+
+
+def start_listener() -> None:
+    global _listener
+    if not settings.cache_invalidation_enabled or _listener is not None:
+        return
+    if make_url(settings.database_url).get_backend_name() != "postgresql":
+        return
+    _listener = InvalidationListener(_listener_dsn(), settings.cache_invalidation_channel)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
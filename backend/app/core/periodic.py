@@ -0,0 +1,60 @@
+"""
+Tareas periódicas en segundo plano (un hilo daemon por tarea).
+"""
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask(threading.Thread):
+    """
+    Ejecuta `fn` cada `interval` segundos hasta `stop()`. Con `run_on_start` se
+    ejecuta nada más arrancar y con `run_on_stop` una última vez al detenerse
+    (p. ej. para vaciar un buffer).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        fn: Callable[[], object],
+        run_on_start: bool = False,
+        run_on_stop: bool = False,
+    ):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.fn = fn
+        self.run_on_start = run_on_start
+        self.run_on_stop = run_on_stop
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def _run_once(self) -> None:
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("Fallo en la tarea periódica %s", self.name)
+
+    def run(self) -> None:
+        if self.run_on_start:
+            self._run_once()
+        while True:
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            self._run_once()
+
+    def wake(self) -> None:
+        """Adelanta la siguiente ejecución (p. ej. cuando un buffer se llena)."""
+        self._wake_event.set()
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        if self.run_on_stop:
+            self._run_once()
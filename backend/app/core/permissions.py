@@ -0,0 +1,125 @@
+"""
+Registro de permisos por rol.
+
+Cada permiso exige un nivel mínimo de rol (`Role.level`, 1 = máximo privilegio).
+Al arrancar se leen los roles de la BD y se compila la máscara de bits de cada
+uno, de modo que comprobar un permiso es una operación O(1) sin consultas.
+
+La misma jerarquía de niveles decide a quién puede gestionar un usuario: solo a
+usuarios de su mismo nivel o inferior (un Admin no toca a un Super Admin).
+Cuando cambian los roles basta con `publish(db, "role", role_id)`: todos los
+workers recargan el registro. `app.db.seed` lo hace al crear roles; tras editar
+roles a mano en SQL:
+    python -m app.core.permissions reload
+"""
+import argparse
+import logging
+from dataclasses import dataclass
+from enum import IntFlag
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.invalidation import publish, register_handler
+from app.models.role import Role
+
+logger = logging.getLogger(__name__)
+
+
+class Permission(IntFlag):
+    USERS_READ = 1 << 0
+    USERS_WRITE = 1 << 1
+    USERS_DELETE = 1 << 2
+    AUDIT_READ = 1 << 3
+    METRICS_READ = 1 << 4
+    SESSIONS_REVOKE_ANY = 1 << 5
+
+
+# Nivel máximo (numéricamente) de rol que concede cada permiso
+PERMISSION_MAX_LEVEL: dict[Permission, int] = {
+    Permission.USERS_READ: 2,
+    Permission.USERS_WRITE: 2,
+    Permission.USERS_DELETE: 2,
+    Permission.AUDIT_READ: 1,
+    Permission.METRICS_READ: 1,
+    Permission.SESSIONS_REVOKE_ANY: 2,
+}
+
+
+@dataclass(frozen=True)
+class CompiledRole:
+    id: int
+    level: int
+    mask: int
+
+
+def compile_role(role_id: int, level: int) -> CompiledRole:
+    mask = 0
+    for permission, max_level in PERMISSION_MAX_LEVEL.items():
+        if level <= max_level:
+            mask |= permission
+    return CompiledRole(id=role_id, level=level, mask=mask)
+
+
+class PermissionRegistry:
+    """Máscaras de permisos por rol. Sin cargar, deniega todo."""
+
+    def __init__(self):
+        self._roles: dict[int, CompiledRole] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._roles)
+
+    def load(self, db: Session) -> None:
+        rows = db.query(Role.id, Role.level).all()
+        # Sustitución atómica: las comprobaciones en curso ven el registro viejo o el nuevo
+        self._roles = {row.id: compile_role(row.id, row.level) for row in rows}
+        logger.info("Registro de permisos cargado con %d roles", len(self._roles))
+
+    def reload(self) -> None:
+        with SessionLocal() as db:
+            self.load(db)
+
+    def has(self, role_id: int, permission: Permission) -> bool:
+        role = self._roles.get(role_id)
+        return role is not None and role.mask & permission == permission
+
+    def can_manage(self, actor_role_id: int, target_role_id: int) -> bool:
+        """True si el actor puede crear, editar o borrar usuarios del rol destino."""
+        actor = self._roles.get(actor_role_id)
+        target = self._roles.get(target_role_id)
+        return actor is not None and target is not None and target.level >= actor.level
+
+    def roles_above(self, role_id: int) -> list[int]:
+        """Roles de mayor privilegio que `role_id`, que este no puede ver ni gestionar."""
+        actor = self._roles.get(role_id)
+        if actor is None:
+            return list(self._roles)
+        return [role.id for role in self._roles.values() if role.level < actor.level]
+
+
+permission_registry = PermissionRegistry()
+
+
+def _reload_safely(_key: str | None = None) -> None:
+    try:
+        permission_registry.reload()
+    except Exception:
+        logger.exception("No se pudo recargar el registro de permisos")
+
+
+register_handler("role", _reload_safely, _reload_safely)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("reload", help="Pide a todos los workers que recarguen los roles")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        role_ids = [role_id for (role_id,) in db.query(Role.id).all()]
+        publish(db, "role", *role_ids)
+        db.commit()
+    print(f"Recarga de roles publicada ({len(role_ids)} roles)")
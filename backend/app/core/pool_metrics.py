@@ -0,0 +1,131 @@
+"""
+Métricas del pool de conexiones de SQLAlchemy.
+
+Los contadores de conexiones en uso, aperturas e invalidaciones se alimentan de
+los eventos del pool. El tiempo de espera al obtener una conexión se mide en
+`connect()` de una subclase del pool, ya que ningún evento se emite antes de la
+espera.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Contadores y tiempos de espera de un pool (uno por engine)."""
+
+    def __init__(self, name: str, sample_size: int = 2048):
+        self.name = name
+        self.engine: Engine | None = None
+        self._lock = threading.Lock()
+        self._waits: deque[float] = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.in_use = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._waits.append(wait_ms)
+
+    def attach(self, engine: Engine) -> None:
+        """Registra los eventos del pool de `engine` (sync_engine en modo async)."""
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.in_use += 1
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.in_use -= 1
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+        pool = self.engine.pool if self.engine is not None else None
+
+        def pct(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p / 100 * len(waits)))] if waits else 0.0
+
+        data: dict[str, Any] = {
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "in_use": self.in_use,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_ms": {
+                "avg": self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                "p50": pct(50),
+                "p99": pct(99),
+                "max": self.max_wait_ms,
+            },
+        }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "status": pool.status(),
+            })
+        return data
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_wait(0.0, timed_out=True)
+            raise
+        self.metrics.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+
+def timed_pool_class(metrics: PoolMetrics, async_mode: bool = False) -> type:
+    """
+    Clase de pool que mide la espera de `connect()`. El atributo de clase
+    sobrevive a `Pool.recreate()`, que instancia `self.__class__`.
+    """
+    base = AsyncAdaptedQueuePool if async_mode else QueuePool
+    return type(f"Timed{base.__name__}", (_TimedPoolMixin, base), {"metrics": metrics})
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    if name not in pool_metrics:
+        pool_metrics[name] = PoolMetrics(name)
+    return pool_metrics[name]
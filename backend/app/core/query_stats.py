@@ -0,0 +1,139 @@
+"""
+Instrumentación de SQL por petición.
+
+Los eventos `before_cursor_execute`/`after_cursor_execute` de cada engine miden
+las sentencias y las acumulan en las estadísticas de la petición en curso (una
+ContextVar que abre `QueryStatsMiddleware`). La ContextVar se propaga al
+threadpool y a `run_sync`, así que funciona en ambos modos de base de datos.
+
+Al terminar la petición el middleware añade la cabecera `Server-Timing` y
+registra en el log las sentencias lentas y las repetidas (patrón N+1).
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    """Sentencias ejecutadas durante una petición."""
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter[str] = Counter()
+        self.slow: list[tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        statement = _WHITESPACE.sub(" ", statement).strip()
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.statements[statement] += 1
+            if elapsed_ms >= settings.sql_slow_query_ms:
+                self.slow.append((statement, elapsed_ms))
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Sentencias ejecutadas al menos `threshold` veces (candidatas a N+1)."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+_observers: list[Callable[[RequestQueryStats], object]] = []
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def add_observer(callback: Callable[[RequestQueryStats], object]) -> None:
+    """Recibe las estadísticas de cada petición terminada (p. ej. en tests)."""
+    _observers.append(callback)
+
+
+def remove_observer(callback: Callable[[RequestQueryStats], object]) -> None:
+    _observers.remove(callback)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra la medición de sentencias en `engine` (sync_engine en modo async)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, (time.perf_counter() - start) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Sin after_cursor_execute el inicio quedaría en la conexión del pool y
+        # descuadraría las mediciones siguientes
+        conn = context.connection
+        if conn is not None and context.statement is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def _report(stats: RequestQueryStats) -> None:
+    for statement, elapsed_ms in stats.slow:
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s %s: %s", elapsed_ms, stats.method, stats.path, statement[:500]
+        )
+    for statement, n in stats.repeated(settings.sql_repeated_statement_threshold):
+        logger.warning(
+            "Sentencia repetida %d veces en %s %s (posible N+1): %s", n, stats.method, stats.path, statement[:500]
+        )
+    for callback in list(_observers):
+        callback(stats)
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI que abre las estadísticas de la petición y emite Server-Timing."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestQueryStats(scope["method"], scope["path"])
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", app;dur={app_ms:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _report(stats)
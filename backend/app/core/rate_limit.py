@@ -0,0 +1,183 @@
+"""
+Limitador de intentos de login y registro.
+
+Ventana deslizante aproximada (contador de la ventana actual más la parte
+proporcional de la anterior) por IP de cliente y por email objetivo. Se comprueba
+al principio de los endpoints, antes de consultar la BD o calcular bcrypt, de modo
+que un ataque de credential stuffing se rechaza con 429 casi sin coste.
+
+Backends (`RATE_LIMIT_BACKEND`):
+- memory: contadores en el proceso; cada worker limita por su cuenta.
+- postgres: contadores compartidos en la tabla UNLOGGED rate_limit_counters,
+  actualizados con un upsert por intento.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import delete, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal, dialect_insert
+from app.core.hashing import password_hasher
+from app.models.rate_limit import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Se lanza cuando una clave supera su límite; `retry_after` en segundos."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Límite de intentos superado, reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Rule:
+    scope: str
+    limit: int
+    window: int
+
+
+def _estimate(current: int, previous: int, window: int, now: float) -> float:
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+def counter_key(scope: str, value: str) -> str:
+    """Clave de contador de longitud fija: el valor (IP o email) va como sha256."""
+    # Un email arbitrariamente largo no cabe en rate_limit_counters.key (VARCHAR 255)
+    return f"{scope}:{hashlib.sha256(value.encode()).hexdigest()}"
+
+
+class MemoryBackend:
+    """Contadores por (clave, ventana) en memoria, acotados en número de claves."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window: int, now: float) -> tuple[int, int]:
+        """Suma un intento y devuelve (intentos ventana actual, intentos ventana anterior)."""
+        window_start = int(now // window * window)
+        with self._lock:
+            start, current, previous = self._counters.pop(key, (window_start, 0, 0))
+            if start != window_start:
+                previous = current if start == window_start - window else 0
+                current = 0
+            current += 1
+            self._counters[key] = (window_start, current, previous)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        return current, previous
+
+
+
+class PostgresBackend:
+    """Contadores compartidos entre workers en la tabla rate_limit_counters."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def hit(self, key: str, window: int, now: float) -> tuple[int, int]:
+        window_start = int(now // window * window)
+        table = RateLimitCounter.__table__
+        with self.session_factory() as db:
+            upsert = dialect_insert(db, table).values(key=key, window_start=window_start, hits=1)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[table.c.key, table.c.window_start],
+                set_={"hits": table.c.hits + 1},
+            ).returning(table.c.hits)
+            current = db.execute(upsert).scalar_one()
+            previous = db.execute(
+                select(table.c.hits).where(table.c.key == key, table.c.window_start == window_start - window)
+            ).scalar() or 0
+            db.commit()
+        return current, previous
+
+    def cleanup(self) -> None:
+        """Borra ventanas que ya no cuentan para ninguna regla (tarea periódica)."""
+        oldest = int(time.time()) - 2 * max(settings.rate_limit_window_seconds, settings.rate_limit_email_window_seconds)
+        with self.session_factory() as db:
+            db.execute(delete(RateLimitCounter).where(RateLimitCounter.window_start < oldest))
+            db.commit()
+
+
+class RateLimiter:
+    def __init__(self, backend: MemoryBackend | PostgresBackend):
+        self.backend = backend
+        self.allowed = 0
+        self.rejected: dict[str, int] = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def hit(self, rules: list[tuple[Rule, str]]) -> None:
+        """Cuenta un intento en cada (regla, valor) y lanza RateLimitExceeded si alguna se supera."""
+        now = time.time()
+        retry_after = 0
+        exceeded: list[str] = []
+        for rule, value in rules:
+            current, previous = self.backend.hit(counter_key(rule.scope, value), rule.window, now)
+            if _estimate(current, previous, rule.window, now) > rule.limit:
+                exceeded.append(rule.scope)
+                retry_after = max(retry_after, rule.window - int(now % rule.window))
+        with self._lock:
+            if not exceeded:
+                self.allowed += 1
+                return
+            for scope in exceeded:
+                self.rejected[scope] = self.rejected.get(scope, 0) + 1
+        raise RateLimitExceeded(retry_after)
+
+    async def check(self, rules: list[tuple[Rule, str]]) -> None:
+        if not settings.rate_limit_enabled:
+            return
+        try:
+            if isinstance(self.backend, MemoryBackend):
+                self.hit(rules)
+            else:
+                await run_in_threadpool(self.hit, rules)
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            # Si falla el almacén compartido no se bloquea el login
+            self.errors += 1
+            logger.exception("Fallo en el limitador de intentos; se deja pasar la petición")
+
+    async def check_login(self, ip: str, email: str) -> None:
+        await self.check([
+            (Rule("login_ip", settings.rate_limit_login_per_ip, settings.rate_limit_window_seconds), ip),
+            (Rule("login_email", settings.rate_limit_login_per_email, settings.rate_limit_email_window_seconds),
+             email.strip().lower()),
+        ])
+
+    async def check_register(self, ip: str, email: str) -> None:
+        await self.check([
+            (Rule("register_ip", settings.rate_limit_register_per_ip, settings.rate_limit_window_seconds), ip),
+            (Rule("register_email", settings.rate_limit_register_per_email, settings.rate_limit_email_window_seconds),
+             email.strip().lower()),
+        ])
+
+    def stats(self) -> dict[str, Any]:
+        rejected = sum(self.rejected.values())
+        # Cada intento rechazado ahorra al menos un hash/verify de bcrypt
+        saved = rejected * password_hasher.avg_cpu_seconds
+        return {
+            "backend": settings.rate_limit_backend,
+            "allowed": self.allowed,
+            "rejected": rejected,
+            "rejected_by_rule": dict(self.rejected),
+            "errors": self.errors,
+            "bcrypt_avg_cpu_ms": password_hasher.avg_cpu_seconds * 1000,
+            "estimated_cpu_seconds_saved": saved,
+        }
+
+
+rate_limiter = RateLimiter(PostgresBackend() if settings.rate_limit_backend == "postgres" else MemoryBackend())
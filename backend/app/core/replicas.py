@@ -0,0 +1,168 @@
+"""
+Enrutado de lecturas a réplicas de PostgreSQL.
+
+Los endpoints de solo lectura usan `get_read_db`, que abre la sesión contra una
+réplica sana (round-robin) y cae al primario si ninguna está por debajo de
+`REPLICA_MAX_LAG_SECONDS`. El retraso de cada réplica lo mide un hilo en segundo
+plano; mientras no haya medición se usa el primario. Las rutas que escriben o que
+deben leer sus propias escrituras siguen usando `get_db`.
+"""
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Generator
+
+from fastapi import Header
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal, attach_engine, engine_options
+from app.core.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Retraso de replicación en segundos; 0 si la réplica ya aplicó todo lo recibido
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    async_engine: AsyncEngine | None = None
+    lag_seconds: float | None = None
+    checked_at: float | None = None
+    error: str | None = None
+
+    @property
+    def healthy(self) -> bool:
+        if self.lag_seconds is None or self.checked_at is None:
+            return False
+        # Una medición vieja no sirve para decidir
+        stale_after = settings.replica_lag_check_interval_seconds * 3
+        if time.monotonic() - self.checked_at > stale_after:
+            return False
+        return self.lag_seconds <= settings.replica_max_lag_seconds
+
+
+class ReplicaRouter:
+    def __init__(self, urls: list[str]):
+        self.replicas: list[Replica] = []
+        for index, url in enumerate(urls):
+            name = f"replica_{index}"
+            replica = Replica(name=name, engine=create_engine(url, **engine_options(name)))
+            attach_engine(name, replica.engine)
+            if settings.database_async:
+                async_name = f"{name}_async"
+                replica.async_engine = create_async_engine(url, **engine_options(async_name, async_mode=True))
+                attach_engine(async_name, replica.async_engine.sync_engine)
+            self.replicas.append(replica)
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+        self.reads_replica = 0
+        self.reads_primary = 0
+        self._monitor: PeriodicTask | None = None
+
+    def check_lag(self) -> None:
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica.lag_seconds = float(conn.execute(LAG_QUERY).scalar() or 0)
+                replica.error = None
+            except Exception as exc:
+                replica.lag_seconds = None
+                replica.error = str(exc)
+                logger.warning("Réplica %s no disponible: %s", replica.name, exc)
+            replica.checked_at = time.monotonic()
+
+    def choose(self, force_primary: bool = False) -> Replica | None:
+        """Siguiente réplica sana o None para usar el primario."""
+        if not force_primary and self._cycle is not None:
+            with self._lock:
+                for _ in range(len(self.replicas)):
+                    replica = next(self._cycle)
+                    if replica.healthy:
+                        self.reads_replica += 1
+                        return replica
+        with self._lock:
+            self.reads_primary += 1
+        return None
+
+    def start(self) -> None:
+        if self.replicas and self._monitor is None:
+            self._monitor = PeriodicTask(
+                "replica-lag-monitor",
+                settings.replica_lag_check_interval_seconds,
+                self.check_lag,
+                run_on_start=True,
+            )
+            self._monitor.start()
+
+    def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor = None
+
+    def stats(self) -> dict:
+        return {
+            "reads_replica": self.reads_replica,
+            "reads_primary": self.reads_primary,
+            "max_lag_seconds": settings.replica_max_lag_seconds,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "error": replica.error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter(settings.database_replica_urls)
+
+
+def wants_primary(read_consistency: str | None) -> bool:
+    return (read_consistency or "").lower() in ("primary", "strong")
+
+
+def open_read_session(force_primary: bool = False) -> Session:
+    """Sesión síncrona de solo lectura contra una réplica sana o el primario."""
+    replica = replica_router.choose(force_primary=force_primary)
+    return SessionLocal(bind=replica.engine) if replica else SessionLocal()
+
+
+def get_sync_read_db(
+    x_read_consistency: str | None = Header(default=None),
+) -> Generator[Session, None, None]:
+    """
+    Sesión de solo lectura. `X-Read-Consistency: primary` fuerza el primario
+    en la petición (p. ej. justo después de una escritura).
+    """
+    db = open_read_session(force_primary=wants_primary(x_read_consistency))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    x_read_consistency: str | None = Header(default=None),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Versión asíncrona de `get_sync_read_db` (modo DATABASE_ASYNC)."""
+    replica = replica_router.choose(force_primary=wants_primary(x_read_consistency))
+    session = AsyncSessionLocal(bind=replica.async_engine) if replica else AsyncSessionLocal()
+    async with session as db:
+        yield db
+
+
+get_read_db = get_async_read_db if settings.database_async else get_sync_read_db
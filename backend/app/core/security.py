@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any
+import hashlib
+import uuid
 import jwt
 from passlib.context import CryptContext
+from app.core import signing_keys
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,18 +21,37 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
-def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
+def configure_bcrypt_rounds(rounds: int) -> None:
     """
-    Genera un token de acceso JWT.
+    Fija el coste de bcrypt de los hashes nuevos. Los hashes de coste menor pasan
+    a `needs_update` y se rehacen en el siguiente login; los de coste mayor se respetan.
+    """
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+def create_access_token(
+    subject: str | Any, expires_delta: timedelta | None = None, session_id: int | None = None
+) -> str:
+    """
+    Genera un token de acceso JWT. `session_id` viaja en el claim `sid` para
+    poder rechazar el token si se revoca su sesión.
     """
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    # type: un refresh token (firmado con la misma SECRET_KEY) nunca vale como access token
+    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    if session_id is not None:
+        to_encode["sid"] = session_id
+    return signing_keys.sign(to_encode)
+
+def decode_access_token(token: str) -> dict[str, Any]:
+    """
+    Verifica un access token con la clave de su `kid` (o SECRET_KEY si no lo
+    lleva) y devuelve sus claims. Lanza jwt.InvalidTokenError si no es válido.
+    """
+    return signing_keys.verify(token)
 
 def create_refresh_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
     """
@@ -40,6 +62,24 @@ def create_refresh_token(subject: str | Any, expires_delta: timedelta | None = N
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    # jti: dos tokens emitidos en el mismo segundo nunca coinciden
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
+
+def decode_refresh_token(refresh_token: str) -> str | None:
+    """Devuelve el `sub` de un refresh token con firma y expiración válidas, o None."""
+    try:
+        payload = jwt.decode(refresh_token, settings.secret_key, algorithms=[settings.algorithm])
+    except jwt.InvalidTokenError:
+        return None
+    if payload.get("type") != "refresh":
+        return None
+    return payload.get("sub")
+
+def refresh_token_digest(refresh_token: str) -> bytes:
+    """
+    SHA-256 del refresh token, clave de búsqueda de la sesión. Basta un hash
+    rápido sin sal: el token ya es un valor aleatorio de alta entropía.
+    """
+    return hashlib.sha256(refresh_token.encode()).digest()
@@ -0,0 +1,119 @@
+"""
+Registro de actividad (`last_seen_at`) de las sesiones con escrituras agrupadas.
+
+Cada petición autenticada solo anota en memoria el instante de uso de su
+sesión; las anotaciones de una misma sesión se funden y un hilo las escribe
+todas juntas cada `SESSION_LAST_SEEN_FLUSH_INTERVAL_SECONDS`, en un único
+UPDATE ejecutado en bloque (executemany). Al apagar la aplicación se vacía el
+buffer y las anotaciones posteriores se ignoran. El valor en BD va, como mucho, un intervalo por detrás del real.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import bindparam, or_, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.periodic import PeriodicTask
+from app.models.session import UserSession
+
+logger = logging.getLogger(__name__)
+
+_sessions = UserSession.__table__
+# Nunca retrasa last_seen_at si otro worker ya escribió un valor posterior
+LAST_SEEN_UPDATE = (
+    update(_sessions)
+    .where(_sessions.c.id == bindparam("session_id"))
+    .where(or_(_sessions.c.last_seen_at.is_(None), _sessions.c.last_seen_at < bindparam("seen_at")))
+    .values(last_seen_at=bindparam("seen_at"))
+)
+
+
+class SessionActivity:
+    def __init__(self, flush_interval: float, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: PeriodicTask | None = None
+        self._stopped = False
+        self.touches = 0
+        self.flushed_rows = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self._stopped = False
+            if self._task is None:
+                self._task = PeriodicTask(
+                    "session-activity-flusher", self.flush_interval, self.flush, run_on_stop=True
+                )
+                self._task.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            task, self._task = self._task, None
+        if task is not None:
+            task.stop()
+        else:
+            self.flush()
+
+    def touch(self, session_id: int) -> None:
+        """Anota el uso de una sesión; solo toca memoria. Tras stop() no hace nada."""
+        if self._task is None and not self._stopped:
+            self.start()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if self._stopped:
+                # Nadie vaciaría ya el buffer: last_seen_at es orientativo
+                return
+            self._pending[session_id] = now
+            self.touches += 1
+
+    def flush(self) -> int:
+        """Escribe las anotaciones pendientes. Devuelve las sesiones enviadas."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            # Orden fijo por id: dos workers nunca se bloquean mutuamente
+            rows = [
+                {"session_id": session_id, "seen_at": seen_at}
+                for session_id, seen_at in sorted(pending.items())
+            ]
+            start = time.perf_counter()
+            try:
+                with self.session_factory() as db:
+                    db.execute(LAST_SEEN_UPDATE, rows)
+                    db.commit()
+            except Exception:
+                self.failures += 1
+                logger.exception("No se pudo actualizar last_seen_at de %d sesiones", len(rows))
+                with self._lock:
+                    # Conservar lo más reciente para el siguiente ciclo
+                    for session_id, seen_at in pending.items():
+                        if session_id not in self._pending:
+                            self._pending[session_id] = seen_at
+                return 0
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushed_rows += len(rows)
+            return len(rows)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "touches": self.touches,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+session_activity = SessionActivity(flush_interval=settings.session_last_seen_flush_interval_seconds)
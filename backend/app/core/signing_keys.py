@@ -0,0 +1,234 @@
+"""
+Registro de claves de firma de los access tokens.
+
+Con JWT_KEYS_DIR vacío los access tokens se firman en HS256 con SECRET_KEY,
+como hasta ahora. Con un directorio de claves se firman con una clave
+asimétrica (EdDSA/Ed25519 o ES256/P-256) y llevan su `kid` en la cabecera, de
+modo que otros servicios pueden verificarlos sin llamar a esta API usando las
+claves públicas de `/.well-known/jwks.json`.
+
+Formato del directorio:
+- `<kid>.pem`: clave privada (PKCS8). Firma la de `kid` mayor en orden
+  alfabético entre las publicadas, o JWT_ACTIVE_KID si se indica.
+- `<kid>.pub.pem`: clave pública de una clave retirada; sigue verificando los
+  tokens que firmó hasta que caducan.
+
+Las claves se leen una vez y se guardan ya parseadas: firmar y verificar no
+vuelven a procesar PEM en cada petición. Los access tokens sin `kid` (HS256 con
+SECRET_KEY, anteriores a las claves) solo se aceptan hasta que la primera clave
+lleva firmando la vida de un access token; después esa vía queda cerrada.
+
+Rotación: `python -m app.core.signing_keys generate --algorithm EdDSA` crea una
+clave con un `kid` posterior a las existentes. Una clave nueva solo verifica (y
+aparece en el JWKS) hasta que su fichero tiene más de
+JWT_KEY_PUBLISH_DELAY_SECONDS, de modo que los consumidores que cachean el JWKS
+ya la conocen cuando empieza a firmar; JWT_ACTIVE_KID la activa antes. La
+anterior se puede convertir en `.pub.pem` (o borrarse) cuando haya pasado la
+vida de un access token.
+"""
+import argparse
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ALGORITHMS = ("EdDSA", "ES256")
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Any | None = None
+    # Epoch del fichero; None = publicada desde siempre
+    created_at: float | None = None
+
+    def jwk(self) -> dict[str, Any]:
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.public_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _algorithm_for(key: Any) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name == "secp256r1":
+        return "ES256"
+    raise ValueError(f"Tipo de clave no soportado: {type(key).__name__}")
+
+
+def load_key_file(path: Path) -> SigningKey:
+    from cryptography.hazmat.primitives import serialization
+
+    data = path.read_bytes()
+    created_at = path.stat().st_mtime
+    if path.name.endswith(".pub.pem"):
+        public_key = serialization.load_pem_public_key(data)
+        return SigningKey(path.name[: -len(".pub.pem")], _algorithm_for(public_key), public_key, created_at=created_at)
+    private_key = serialization.load_pem_private_key(data, password=None)
+    return SigningKey(path.stem, _algorithm_for(private_key), private_key.public_key(), private_key, created_at)
+
+
+class KeyRegistry:
+    """Claves de verificación por `kid` y clave activa de firma."""
+
+    def __init__(self):
+        self._keys: dict[str, SigningKey] = {}
+        self._active: SigningKey | None = None
+        # (momento en que puede firmar, clave) de las claves nuevas aún sin publicar
+        self._pending: list[tuple[float, SigningKey]] = []
+        # Hasta cuándo se aceptan tokens HS256 sin kid; None = sin claves, sin límite
+        self._legacy_until: float | None = None
+        self._jwks: dict[str, Any] = {"keys": []}
+
+    @property
+    def legacy_until(self) -> float | None:
+        return self._legacy_until
+
+    @property
+    def active(self) -> SigningKey | None:
+        pending = self._pending
+        if pending and pending[0][0] <= time.time():
+            self._promote(pending)
+        return self._active
+
+    def _promote(self, pending: list[tuple[float, SigningKey]]) -> None:
+        now = time.time()
+        ready = [key for activate_at, key in pending if activate_at <= now]
+        active = max(ready, key=lambda key: key.kid)
+        self._active = active
+        self._pending = [(activate_at, key) for activate_at, key in pending if key.kid > active.kid]
+
+    def load(self, keys: list[SigningKey], active_kid: str | None = None, publish_delay: float = 0.0) -> None:
+        by_kid = {key.kid: key for key in keys}
+        signers = sorted(kid for kid, key in by_kid.items() if key.private_key is not None)
+        pending: list[tuple[float, SigningKey]] = []
+        if active_kid:
+            kid = active_kid
+        else:
+            # Las claves nuevas solo verifican hasta que el JWKS cacheado por los consumidores las incluye
+            now = time.time()
+            published = [kid for kid in signers if (by_kid[kid].created_at or 0) + publish_delay <= now]
+            kid = published[-1] if published else None
+            pending = sorted((
+                (by_kid[other].created_at + publish_delay, by_kid[other])
+                for other in signers
+                if other not in published and (kid is None or other > kid)
+            ), key=lambda item: item[0])
+        if kid is not None and kid not in signers:
+            raise ValueError(f"La clave activa {kid!r} no existe o no tiene parte privada")
+        legacy_until = None
+        if by_kid:
+            # La clave más antigua marca cuándo se habilitó el registro: igual en
+            # todos los workers y tras reiniciar
+            dated = [key.created_at for key in keys if key.created_at is not None]
+            enabled_at = min(dated) if dated else time.time()
+            legacy_until = enabled_at + publish_delay + settings.access_token_expire_minutes * 60
+        # Sustitución atómica, como en el registro de permisos
+        self._keys = by_kid
+        self._active = by_kid[kid] if kid else None
+        self._pending = pending
+        self._legacy_until = legacy_until
+        self._jwks = {"keys": [key.jwk() for key in by_kid.values()]}
+
+    def load_dir(self, directory: str | Path, active_kid: str | None = None, publish_delay: float | None = None) -> None:
+        if publish_delay is None:
+            publish_delay = settings.jwt_key_publish_delay_seconds
+        paths = sorted(Path(directory).glob("*.pem"))
+        self.load([load_key_file(path) for path in paths], active_kid, publish_delay)
+        logger.info(
+            "Cargadas %d claves de firma JWT (activa: %s)", len(self._keys), self._active.kid if self._active else None
+        )
+
+    def reload(self) -> None:
+        if settings.jwt_keys_dir:
+            self.load_dir(settings.jwt_keys_dir, settings.jwt_active_kid or None)
+        else:
+            self.load([])
+
+    def get(self, kid: str) -> SigningKey | None:
+        return self._keys.get(kid)
+
+    def jwks(self) -> dict[str, Any]:
+        return self._jwks
+
+
+key_registry = KeyRegistry()
+
+
+def sign(payload: dict[str, Any]) -> str:
+    """Firma con la clave activa o, si no hay, en HS256 con SECRET_KEY."""
+    key = key_registry.active
+    if key is None:
+        return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm)
+    return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+
+def verify(token: str) -> dict[str, Any]:
+    """Verifica firma y expiración eligiendo la clave por `kid`; lanza jwt.InvalidTokenError."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        legacy_until = key_registry.legacy_until
+        if legacy_until is not None and time.time() > legacy_until:
+            raise jwt.InvalidTokenError("Token sin kid: HS256 ya no se acepta con JWT_KEYS_DIR")
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    key = key_registry.get(kid)
+    if key is None:
+        raise jwt.InvalidTokenError(f"kid desconocido: {kid}")
+    # El algoritmo lo fija la clave, nunca la cabecera del token
+    return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+
+def generate_key(algorithm: str) -> Any:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Algoritmo no soportado: {algorithm}")
+
+
+def write_new_key(directory: str | Path, algorithm: str) -> Path:
+    """Crea `<kid>.pem` con un kid ordenable por fecha, posterior a los existentes."""
+    from cryptography.hazmat.primitives import serialization
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    kid = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S%f}-{secrets.token_hex(4)}"
+    pem = generate_key(algorithm).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    path = directory / f"{kid}.pem"
+    path.touch(mode=0o600)
+    path.write_bytes(pem)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate = subparsers.add_parser("generate", help="Crea una clave nueva que firmará tras el retardo de publicación")
+    generate.add_argument("--algorithm", choices=SUPPORTED_ALGORITHMS, default="EdDSA")
+    generate.add_argument("--dir", default=settings.jwt_keys_dir or "keys/jwt")
+    subparsers.add_parser("jwks", help="Muestra el JWKS de JWT_KEYS_DIR")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        print(f"Clave creada: {write_new_key(args.dir, args.algorithm)}")
+    else:
+        import json
+
+        key_registry.reload()
+        print(json.dumps(key_registry.jwks(), indent=2))
@@ -1,6 +1,14 @@
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 from app.models.audit import AuditLog
-from typing import List, Optional, Dict, Any
+from app.schemas.audit import AuditLogFilter
+from app.core.config import settings
+from app.core.audit_buffer import audit_buffer
+from app.core.database import UNIT_OF_WORK, after_commit, commit_or_flush
+from app.crud.pagination import decode_cursor, encode_cursor
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Tuple
 
 def create_audit_log(
     db: Session,
@@ -12,21 +20,118 @@ def create_audit_log(
     new_values: Optional[Dict[str, Any]] = None,
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None
-) -> AuditLog:
-    db_audit = AuditLog(
-        user_id=user_id,
-        action=action,
-        entity_name=entity_name,
-        entity_id=entity_id,
-        old_values=old_values,
-        new_values=new_values,
-        ip_address=ip_address,
-        user_agent=user_agent
-    )
+) -> Optional[AuditLog]:
+    """
+    Registra una entrada de auditoría según AUDIT_WRITE_MODE.
+
+    - durable: se añade a la sesión de quien llama y se confirma en la misma
+      transacción que el cambio auditado.
+    - buffered: se encola para inserción en lote; devuelve None. Dentro de una
+      unidad de trabajo se encola al confirmarse, de modo que un rollback no deja
+      entrada; si entonces el buffer no la admite se inserta en una transacción
+      propia. Fuera de ella, con el buffer lleno se escribe en modo durable.
+    """
+    values = {
+        "user_id": user_id,
+        "action": action,
+        "entity_name": entity_name,
+        "entity_id": entity_id,
+        "old_values": jsonable_encoder(old_values) if old_values is not None else None,
+        "new_values": jsonable_encoder(new_values) if new_values is not None else None,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "created_at": datetime.now(timezone.utc),
+    }
+    if settings.audit_write_mode == "buffered":
+        if db.info.get(UNIT_OF_WORK):
+            after_commit(db, lambda: audit_buffer.add(values))
+            return None
+        if audit_buffer.enqueue(values):
+            return None
+    db_audit = AuditLog(**values)
     db.add(db_audit)
-    db.commit()
-    db.refresh(db_audit)
+    commit_or_flush(db)
     return db_audit
 
-def get_audit_logs(db: Session, skip: int = 0, limit: int = 100) -> List[AuditLog]:
-    return db.query(AuditLog).order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+def _as_naive_utc(value: datetime) -> datetime:
+    # created_at se guarda como UTC sin zona horaria
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def audit_filter_clauses(filters: Optional[AuditLogFilter]) -> list:
+    """Condiciones WHERE para los filtros indicados (los vacíos se ignoran)."""
+    if filters is None:
+        return []
+    clauses = []
+    if filters.user_id is not None:
+        clauses.append(AuditLog.user_id == filters.user_id)
+    if filters.action:
+        clauses.append(AuditLog.action == filters.action)
+    if filters.entity_name:
+        clauses.append(AuditLog.entity_name == filters.entity_name)
+    if filters.entity_id is not None:
+        clauses.append(AuditLog.entity_id == filters.entity_id)
+    if filters.ip_address:
+        clauses.append(AuditLog.ip_address == filters.ip_address)
+    if filters.created_from is not None:
+        clauses.append(AuditLog.created_at >= _as_naive_utc(filters.created_from))
+    if filters.created_to is not None:
+        clauses.append(AuditLog.created_at < _as_naive_utc(filters.created_to))
+    return clauses
+
+def _audit_query(db: Session, filters: Optional[AuditLogFilter], columns: Optional[Sequence[Any]]):
+    query = db.query(*columns) if columns else db.query(AuditLog)
+    return query.filter(*audit_filter_clauses(filters))
+
+def get_audit_logs(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[AuditLogFilter] = None,
+    columns: Optional[Sequence[Any]] = None,
+) -> List[AuditLog]:
+    """Logs filtrados; con `columns` devuelve filas con solo esas columnas."""
+    query = _audit_query(db, filters, columns)
+    return query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+
+def get_audit_logs_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    filters: Optional[AuditLogFilter] = None,
+    columns: Optional[Sequence[Any]] = None,
+) -> Tuple[List[AuditLog], Optional[str]]:
+    """
+    Página keyset sobre (created_at, id) descendente, apoyada en el índice
+    ix_audit_logs_created_at_id. El coste no depende de la profundidad.
+    Con `columns`, estas deben incluir created_at e id.
+    """
+    limit = max(limit, 1)
+    query = _audit_query(db, filters, columns)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, last_id))
+    logs = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(logs) > limit:
+        last = logs[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return logs[:limit], next_cursor
+
+def iter_audit_logs(
+    db: Session, filters: Optional[AuditLogFilter] = None, batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre los logs filtrados con un cursor del servidor (`yield_per`), de
+    `batch_size` en `batch_size` filas, sin cargar el resultado en memoria.
+    Devuelve filas como diccionarios, sin pasar por el identity map del ORM.
+    """
+    stmt = (
+        select(*AuditLog.__table__.columns)
+        .where(*audit_filter_clauses(filters))
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.execute(stmt).mappings():
+        yield dict(row)
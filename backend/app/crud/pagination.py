@@ -0,0 +1,36 @@
+"""
+Cursores opacos para paginación keyset.
+
+El cursor codifica en base64url los valores de la clave de orden de la última
+fila entregada, p. ej. `(created_at, id)`; la siguiente página filtra por la
+comparación de filas en lugar de usar OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no se pudo decodificar."""
+
+
+def encode_cursor(*values: Any) -> str:
+    data = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decodifica un cursor validando la cantidad y el tipo de sus valores."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, list) or len(data) != len(types):
+            raise InvalidCursorError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for value, kind in zip(data, types)
+        )
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError(cursor) from exc
@@ -0,0 +1,143 @@
+"""
+Lógica CRUD para el modelo UserSession.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session, load_only
+from app.models.session import UserSession
+from app.core.config import settings
+from app.core.database import after_commit, commit_or_flush
+from app.core.invalidation import publish
+from app.core.revocation import revoked_sessions
+from app.core.security import refresh_token_digest
+from app.crud.pagination import decode_cursor, encode_cursor
+
+# Proyección de SessionResponse: no carga el hash del token
+SESSION_LIST_COLUMNS = load_only(
+    UserSession.id,
+    UserSession.user_id,
+    UserSession.device_info,
+    UserSession.ip_address,
+    UserSession.expires_at,
+    UserSession.is_revoked,
+    UserSession.created_at,
+    UserSession.last_seen_at,
+)
+
+# Consultas calientes construidas una sola vez: ni se rehacen ni se recalcula
+# su clave de caché en cada llamada, y su SQL idéntico permite prepararlas en el servidor
+_ROTATE_REFRESH_TOKEN = (
+    update(UserSession)
+    .where(
+        UserSession.refresh_token_hash == bindparam("token_hash"),
+        UserSession.is_revoked == False,
+        UserSession.expires_at > bindparam("now"),
+    )
+    .values(
+        refresh_token_hash=bindparam("new_token_hash"),
+        expires_at=bindparam("new_expires_at"),
+        last_seen_at=bindparam("now"),
+    )
+    .returning(UserSession.id, UserSession.user_id)
+    .execution_options(synchronize_session=False)
+)
+
+def session_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
+
+def create_user_session(
+    db: Session,
+    user_id: int,
+    refresh_token: str,
+    ip_address: str | None = None,
+    device_info: str | None = None,
+) -> UserSession:
+    user_session = UserSession(
+        user_id=user_id,
+        refresh_token_hash=refresh_token_digest(refresh_token),
+        ip_address=ip_address,
+        device_info=device_info,
+        expires_at=session_expiry(),
+        last_seen_at=datetime.now(timezone.utc),
+    )
+    db.add(user_session)
+    commit_or_flush(db)
+    return user_session
+
+def rotate_refresh_token(
+    db: Session, refresh_token: str, new_refresh_token: str, expires_at: datetime
+) -> tuple[int, int] | None:
+    """
+    Sustituye el refresh token de una sesión válida por uno nuevo en un único
+    UPDATE ... RETURNING. Devuelve (session_id, user_id), o None si el token no
+    corresponde a una sesión activa (incluido un token ya rotado).
+    """
+    row = db.execute(
+        _ROTATE_REFRESH_TOKEN,
+        {
+            "token_hash": refresh_token_digest(refresh_token),
+            "new_token_hash": refresh_token_digest(new_refresh_token),
+            "new_expires_at": expires_at,
+            "now": datetime.now(timezone.utc),
+        },
+    ).first()
+    if row is None:
+        return None
+    commit_or_flush(db)
+    return row.id, row.user_id
+
+def _active_sessions(db: Session, user_id: int, columns: Sequence[Any] | None):
+    query = db.query(*columns) if columns else db.query(UserSession).options(SESSION_LIST_COLUMNS)
+    return query.filter(UserSession.user_id == user_id, UserSession.is_revoked == False)
+
+def get_active_sessions(db: Session, user_id: int, columns: Sequence[Any] | None = None) -> list[UserSession]:
+    """Sesiones activas; con `columns` devuelve filas con solo esas columnas."""
+    return _active_sessions(db, user_id, columns).all()
+
+def get_active_sessions_page(
+    db: Session, user_id: int, cursor: str | None = None, limit: int = 100, columns: Sequence[Any] | None = None
+) -> tuple[list[UserSession], str | None]:
+    """Página keyset de sesiones activas, de la más reciente a la más antigua; `columns` debe incluir id."""
+    limit = max(limit, 1)
+    query = _active_sessions(db, user_id, columns)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(UserSession.id < last_id)
+    sessions = query.order_by(UserSession.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(sessions[limit - 1].id) if len(sessions) > limit else None
+    return sessions[:limit], next_cursor
+
+def revoke_user_session(db: Session, session_id: int, user_id: int) -> UserSession | None:
+    session = db.query(UserSession).filter(
+        UserSession.id == session_id,
+        UserSession.user_id == user_id
+    ).first()
+    if session:
+        session.is_revoked = True
+        session.revoked_at = datetime.now(timezone.utc)
+        db.add(session)
+        session_id = session.id
+        publish(db, "session", session_id)
+        after_commit(db, lambda: revoked_sessions.add(session_id))
+        commit_or_flush(db)
+    return session
+
+def revoke_user_sessions(db: Session, user_id: int, except_session_id: int | None = None) -> list[int]:
+    """
+    Revoca de una vez todas las sesiones activas de un usuario (menos
+    `except_session_id`) con un único UPDATE ... RETURNING. Devuelve los ids.
+    """
+    query = update(UserSession).where(UserSession.user_id == user_id, UserSession.is_revoked == False)
+    if except_session_id is not None:
+        query = query.where(UserSession.id != except_session_id)
+    session_ids = list(db.execute(
+        query.values(is_revoked=True, revoked_at=datetime.now(timezone.utc))
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    if session_ids:
+        publish(db, "session", *session_ids)
+        after_commit(db, lambda: revoked_sessions.add(*session_ids))
+        commit_or_flush(db)
+    return session_ids
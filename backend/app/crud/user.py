@@ -1,55 +1,123 @@
 """
 Lógica CRUD para el modelo User.
 """
+from typing import Any, Sequence
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserUpdateMe
 from app.core.security import get_password_hash
+from app.core.cache import Principal, principal_cache
+from app.core.database import after_commit, commit_or_flush, dialect_insert
+from app.core.invalidation import publish
+from app.core.permissions import permission_registry
+from app.crud.pagination import decode_cursor, encode_cursor
+
+# Consultas calientes (autenticación y login) construidas una sola vez
+_PRINCIPAL_BY_ID = select(User.id, User.email, User.role_id, User.is_active).where(User.id == bindparam("user_id"))
+# Comparan con lower() para usar el índice único uq_users_email_lower
+_USER_BY_EMAIL = select(User).where(func.lower(User.email) == func.lower(bindparam("email"))).limit(1)
+
+def _invalidate_user(db: Session, user_id: int) -> None:
+    # El NOTIFY viaja con la transacción; la caché local se limpia al confirmar
+    publish(db, "user", user_id)
+    after_commit(db, lambda: principal_cache.invalidate(user_id))
 
 def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+    # db.get usa la sentencia por clave primaria que el ORM ya tiene compilada
+    return db.get(User, user_id)
+
+def get_principal(db: Session, user_id: int) -> Principal | None:
+    row = db.execute(_PRINCIPAL_BY_ID, {"user_id": user_id}).first()
+    if not row:
+        return None
+    return Principal(id=row.id, email=row.email, role_id=row.role_id, is_active=bool(row.is_active))
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+    return db.execute(_USER_BY_EMAIL, {"email": email}).scalars().first()
 
-def get_users(db: Session, current_user: User, skip: int = 0, limit: int = 100):
-    query = db.query(User)
-    if current_user.role_id == 2:
-        query = query.filter(User.role_id != 1)
+def _visible_users(db: Session, current_user: Principal, columns: Sequence[Any] | None = None):
+    # Los usuarios de roles superiores al propio no se listan
+    query = db.query(*columns) if columns else db.query(User)
+    hidden_roles = permission_registry.roles_above(current_user.role_id)
+    if hidden_roles:
+        query = query.filter(User.role_id.notin_(hidden_roles))
+    return query
+
+def get_users(
+    db: Session, current_user: Principal, skip: int = 0, limit: int = 100, columns: Sequence[Any] | None = None
+):
+    """Usuarios visibles; con `columns` devuelve filas con solo esas columnas."""
+    query = _visible_users(db, current_user, columns)
     return query.offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        phone_number=user.phone_number,
-        profile_picture=user.profile_picture,
-        date_of_birth=user.date_of_birth,
-        gender=user.gender,
-        role_id=user.role_id,
-        is_active=user.is_active
+def get_users_page(
+    db: Session,
+    current_user: Principal,
+    cursor: str | None = None,
+    limit: int = 100,
+    columns: Sequence[Any] | None = None,
+):
+    """Página keyset ordenada por id. Devuelve (usuarios, next_cursor); `columns` debe incluir User.id."""
+    limit = max(limit, 1)
+    query = _visible_users(db, current_user, columns)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(User.id > last_id)
+    users = query.order_by(User.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(users[limit - 1].id) if len(users) > limit else None
+    return users[:limit], next_cursor
+
+def create_user(db: Session, user: UserCreate, hashed_password: str | None = None) -> User | None:
+    """
+    Crea el usuario en un único INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Devuelve None si el email ya existe (sin distinguir mayúsculas), también
+    cuando dos registros concurrentes compiten por el mismo email.
+    """
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
+    statement = (
+        dialect_insert(db, User)
+        .values(
+            email=user.email,
+            hashed_password=hashed_password,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            phone_number=user.phone_number,
+            profile_picture=user.profile_picture,
+            date_of_birth=user.date_of_birth,
+            gender=user.gender,
+            role_id=user.role_id,
+            is_active=user.is_active,
+        )
+        .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+        .returning(User)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db_user = db.execute(statement).scalars().first()
+    commit_or_flush(db)
+    return db_user
+
+def update_password_hash(db: Session, db_user: User, hashed_password: str):
+    """Guarda el hash rehecho con el coste actual de bcrypt tras un login correcto."""
+    db_user.hashed_password = hashed_password
+    commit_or_flush(db)
     return db_user
 
 def delete_user(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id).first()
+    # db.get reutiliza el usuario ya cargado en la petición sin otra consulta
+    user = db.get(User, user_id)
     if user:
         user.is_active = False
-        db.commit()
-        db.refresh(user)
+        _invalidate_user(db, user.id)
+        commit_or_flush(db)
     return user
 
-def update_user(db: Session, db_user: User, update_data: UserUpdate):
+def update_user(db: Session, db_user: User, update_data: UserUpdate, hashed_password: str | None = None):
     user_data = update_data.model_dump(exclude_unset=True)
     if "password" in user_data:
         password = user_data["password"]
-        hashed_password = get_password_hash(password)
+        if hashed_password is None:
+            hashed_password = get_password_hash(password)
         user_data["hashed_password"] = hashed_password
         del user_data["password"]
 
@@ -57,16 +125,17 @@ def update_user(db: Session, db_user: User, update_data: UserUpdate):
         setattr(db_user, key, value)
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _invalidate_user(db, db_user.id)
+    commit_or_flush(db)
     return db_user
 
-def update_user_me(db: Session, db_user: User, user_in: UserUpdateMe):
+def update_user_me(db: Session, db_user: User, user_in: UserUpdateMe, hashed_password: str | None = None):
     user_data = user_in.model_dump(exclude_unset=True)
     
     if "password" in user_data:
         password = user_data["password"]
-        hashed_password = get_password_hash(password)
+        if hashed_password is None:
+            hashed_password = get_password_hash(password)
         user_data["hashed_password"] = hashed_password
         del user_data["password"]
     
@@ -75,6 +144,12 @@ def update_user_me(db: Session, db_user: User, user_in: UserUpdateMe):
             setattr(db_user, field, user_data[field])
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _invalidate_user(db, db_user.id)
+    commit_or_flush(db)
+    return db_user
+
+def update_profile_picture(db: Session, db_user: User, profile_picture: str):
+    db_user.profile_picture = profile_picture
+    _invalidate_user(db, db_user.id)
+    commit_or_flush(db)
     return db_user
@@ -0,0 +1,115 @@
+"""
+Mantenimiento de las particiones mensuales de audit_logs.
+
+- ensure_partitions: crea por adelantado las particiones de los próximos meses
+  y las de los meses con filas en audit_logs_default, que audit_logs_create_partition
+  mueve a su partición. DEFAULT debe quedar vacía; si no, se registra un error.
+- drop_expired_partitions: aplica la retención separando (DETACH) y borrando
+  particiones completas, en lugar de hacer DELETE fila a fila.
+
+Uso (p. ej. desde cron):
+    python -m app.db.audit_partitions --retention-months 12
+    python -m app.db.audit_partitions --retention-months 12 --detach-only
+"""
+import argparse
+import logging
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _current_month() -> date:
+    # created_at se guarda en UTC: el mes lo marca la fecha UTC, no la local
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+def ensure_partitions(db: Session, months_ahead: int) -> list[str]:
+    """
+    Crea (si faltan) las particiones del mes actual, los `months_ahead` siguientes
+    y los meses que tengan filas en la partición DEFAULT.
+    """
+    current = _current_month()
+    months = {_add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(db.execute(text(
+        "SELECT DISTINCT date_trunc('month', created_at)::date FROM audit_logs_default"
+    )).scalars())
+    names = [
+        db.execute(
+            text("SELECT audit_logs_create_partition(:month_start)"),
+            {"month_start": month_start},
+        ).scalar_one()
+        for month_start in sorted(months)
+    ]
+    db.commit()
+    if db.execute(text("SELECT EXISTS (SELECT 1 FROM audit_logs_default)")).scalar_one():
+        logger.error("audit_logs_default sigue teniendo filas tras crear las particiones; revisar a mano")
+    return names
+
+
+def list_partitions(db: Session) -> list[tuple[str, date]]:
+    """Particiones mensuales existentes con el primer día de su mes."""
+    rows = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'audit_logs'"
+    )).scalars()
+    partitions = []
+    for name in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def drop_expired_partitions(db: Session, retention_months: int, detach_only: bool = False) -> list[str]:
+    """
+    Separa y borra las particiones cuyo mes completo quedó fuera de la retención.
+    Con `detach_only` se conservan como tablas sueltas (p. ej. para archivarlas).
+    """
+    cutoff = _add_months(_current_month(), -retention_months)
+    expired = [name for name, month_start in list_partitions(db) if _add_months(month_start, 1) <= cutoff]
+    for name in expired:
+        db.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION "{name}"'))
+        if not detach_only:
+            db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+    return expired
+
+
+def run_maintenance() -> None:
+    """Tarea periódica de la aplicación: solo crea particiones futuras."""
+    with SessionLocal() as db:
+        ensure_partitions(db, settings.audit_partition_months_ahead)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=settings.audit_partition_months_ahead)
+    parser.add_argument("--retention-months", type=int, default=settings.audit_retention_months)
+    parser.add_argument("--detach-only", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for name in ensure_partitions(db, args.months_ahead):
+            print(f"Partición lista: {name}")
+        if args.retention_months > 0:
+            for name in drop_expired_partitions(db, args.retention_months, detach_only=args.detach_only):
+                print(f"Partición {'separada' if args.detach_only else 'eliminada'}: {name}")
+    finally:
+        db.close()
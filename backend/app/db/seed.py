@@ -1,5 +1,7 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
+from app.core.invalidation import publish
 from app.models.role import Role
 from app.models.user import User
 from app.core.security import get_password_hash
@@ -14,20 +16,24 @@ def init_db(db: Session) -> None:
         {"id": 5, "name": "Visitante", "level": 5, "description": "Solo lectura"},
     ]
 
+    created = []
     for role_data in roles_data:
         role = db.query(Role).filter(Role.id == role_data["id"]).first()
         if not role:
             role = Role(**role_data)
             db.add(role)
+            created.append(role.id)
             print(f"Rol creado: {role.name}")
         else:
             print(f"Rol ya existe: {role.name}")
-    
+
+    # Los workers en marcha recargan su registro de permisos al confirmar
+    publish(db, "role", *created)
     db.commit()
 
     # 2. Crear Super Admin
     admin_email = "admin@empresa.com"
-    user = db.query(User).filter(User.email == admin_email).first()
+    user = db.query(User).filter(func.lower(User.email) == admin_email).first()
     if not user:
         user = User(
             email=admin_email,
@@ -0,0 +1,125 @@
+"""
+Compactación de user_sessions.
+
+Borra en lotes acotados, con una pausa entre lotes, las sesiones:
+- no revocadas y caducadas (expires_at ya pasado), y
+- revocadas hace más que la vida de un access token, o caducadas hace más que
+  esa vida. Antes de eso sus ids deben seguir en la BD para que el conjunto de
+  sesiones revocadas los cargue, aunque la sesión ya haya caducado.
+
+Cada lote es una transacción corta (DELETE ... WHERE id IN (SELECT ... LIMIT n
+FOR UPDATE SKIP LOCKED)), así varios workers pueden ejecutarla a la vez sin
+bloquearse entre sí ni frenar los logins.
+
+Uso (p. ej. desde cron si SESSION_COMPACTION_ENABLED=false):
+    python -m app.db.session_compaction --batch-size 5000 --pause 0.05
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import and_, delete, or_, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.session import UserSession
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactionReport:
+    deleted: int = 0
+    batches: int = 0
+    batch_ms: list[float] = field(default_factory=list)
+    started_at: datetime | None = None
+    duration_ms: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "batch_ms_avg": sum(self.batch_ms) / len(self.batch_ms) if self.batch_ms else 0.0,
+            "batch_ms_max": max(self.batch_ms, default=0.0),
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+        }
+
+
+last_report: CompactionReport | None = None
+
+
+def compactable_condition(now: datetime):
+    revoked_before = now - timedelta(minutes=settings.access_token_expire_minutes)
+    return or_(
+        and_(UserSession.is_revoked == False, UserSession.expires_at < now),
+        and_(
+            UserSession.is_revoked == True,
+            or_(UserSession.revoked_at < revoked_before, UserSession.expires_at < revoked_before),
+        ),
+    )
+
+
+def compact_sessions(
+    session_factory=SessionLocal,
+    batch_size: int | None = None,
+    pause: float | None = None,
+    max_batches: int | None = None,
+) -> CompactionReport:
+    """Borra sesiones compactables lote a lote hasta que no quede ninguna."""
+    global last_report
+    batch_size = batch_size or settings.session_compaction_batch_size
+    pause = settings.session_compaction_pause_seconds if pause is None else pause
+    report = CompactionReport(started_at=datetime.now(timezone.utc))
+    start = time.perf_counter()
+    while max_batches is None or report.batches < max_batches:
+        batch_start = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        ids = (
+            select(UserSession.id)
+            .where(compactable_condition(now))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        with session_factory() as db:
+            deleted = db.execute(
+                delete(UserSession).where(UserSession.id.in_(ids)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+        report.batch_ms.append((time.perf_counter() - batch_start) * 1000)
+        report.batches += 1
+        report.deleted += deleted
+        if deleted < batch_size:
+            break
+        time.sleep(pause)
+    report.duration_ms = (time.perf_counter() - start) * 1000
+    last_report = report
+    if report.deleted:
+        logger.info(
+            "Compactación de sesiones: %d filas borradas en %d lotes (%.1f ms, lote máx. %.1f ms)",
+            report.deleted, report.batches, report.duration_ms, max(report.batch_ms),
+        )
+    return report
+
+
+def run_compaction() -> None:
+    """Tarea periódica de la aplicación."""
+    compact_sessions()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=settings.session_compaction_batch_size)
+    parser.add_argument("--pause", type=float, default=settings.session_compaction_pause_seconds)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    result = compact_sessions(batch_size=args.batch_size, pause=args.pause, max_batches=args.max_batches)
+    summary = result.as_dict()
+    print(f"Sesiones borradas: {summary['deleted']} en {summary['batches']} lotes")
+    print(f"Duración total: {summary['duration_ms']:.1f} ms; lote medio {summary['batch_ms_avg']:.1f} ms, "
+          f"máximo {summary['batch_ms_max']:.1f} ms")
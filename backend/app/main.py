@@ -1,21 +1,111 @@
 """
 Punto de entrada de FastAPI y endpoints base.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Any
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.core.hashing import HashingOverloadedError, password_hasher
+from app.core.invalidation import start_listener, stop_listener
+from app.core.replicas import replica_router
+from app.core.audit_buffer import audit_buffer
+from app.core.periodic import PeriodicTask
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.rate_limit import PostgresBackend, RateLimitExceeded, rate_limiter
+from app.core.permissions import permission_registry
+from app.core.revocation import revoked_sessions
+from app.core.signing_keys import key_registry
+from app.core.session_activity import session_activity
+from app.db.audit_partitions import run_maintenance as run_audit_partition_maintenance
+from app.db.session_compaction import run_compaction as run_session_compaction
+from app.crud.pagination import InvalidCursorError
 from app.api.routers import auth
 from app.api.routers import users
 from app.api.routers import audit
+from app.api.routers import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y apagado ordenado de los recursos de la aplicación."""
+    # Sin roles cargados se deniega todo; mejor fallar al arrancar
+    permission_registry.reload()
+    revoked_sessions.reload()
+    key_registry.reload()
+    password_hasher.calibrate()
+    password_hasher.start()
+    start_listener()
+    replica_router.start()
+    if settings.audit_write_mode == "buffered":
+        audit_buffer.start()
+    partition_task = None
+    if settings.audit_partition_maintenance_enabled and engine.dialect.name == "postgresql":
+        partition_task = PeriodicTask(
+            "audit-partition-maintenance", 24 * 3600, run_audit_partition_maintenance, run_on_start=True
+        )
+        partition_task.start()
+    compaction_task = None
+    if settings.session_compaction_enabled:
+        compaction_task = PeriodicTask(
+            "session-compaction", settings.session_compaction_interval_seconds, run_session_compaction
+        )
+        compaction_task.start()
+    rate_limit_cleanup_task = None
+    if settings.rate_limit_enabled and isinstance(rate_limiter.backend, PostgresBackend):
+        rate_limit_cleanup_task = PeriodicTask(
+            "rate-limit-cleanup", settings.rate_limit_cleanup_interval_seconds, rate_limiter.backend.cleanup
+        )
+        rate_limit_cleanup_task.start()
+    yield
+    if rate_limit_cleanup_task is not None:
+        rate_limit_cleanup_task.stop()
+    if compaction_task is not None:
+        compaction_task.stop()
+    if partition_task is not None:
+        partition_task.stop()
+    # Vaciar la auditoría y la actividad pendientes antes de cerrar los engines
+    audit_buffer.stop()
+    session_activity.stop()
+    replica_router.stop()
+    stop_listener()
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 app = FastAPI(
     title=settings.project_name,
     version=settings.version,
-    description="API para el Sistema de Control de Inventario"
+    description="API para el Sistema de Control de Inventario",
+    lifespan=lifespan,
 )
 
+@app.exception_handler(HashingOverloadedError)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloadedError) -> JSONResponse:
+    """Rechaza rápido cuando la cola de bcrypt está llena, en lugar de encolar más."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """Responde 429 con Retry-After antes de tocar la BD o bcrypt."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Demasiados intentos, intenta de nuevo más tarde"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError) -> JSONResponse:
+    """Un cursor manipulado o de otro listado es un error del cliente, no un 500."""
+    return JSONResponse(status_code=400, content={"detail": "Cursor de paginación inválido"})
+
 # Configuración de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,8 +113,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos los métodos (GET, POST, etc.)
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+if settings.sql_instrumentation_enabled:
+    # Conteo y tiempo de SQL por petición en la cabecera Server-Timing
+    app.add_middleware(QueryStatsMiddleware)
+
 UPLOAD_DIR = "uploads/profile_pictures"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 app.mount("/static", StaticFiles(directory="uploads"), name="static")
@@ -32,9 +127,16 @@ app.mount("/static", StaticFiles(directory="uploads"), name="static")
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(audit.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
+
+@app.get("/.well-known/jwks.json", tags=["System"])
+async def jwks(response: Response) -> dict[str, Any]:
+    """Claves públicas para verificar los access tokens sin llamar a esta API."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_registry.jwks()
 
 @app.get("/api/v1/health-check", tags=["System"])
-def health_check() -> dict[str, str]:
+async def health_check() -> dict[str, str]:
     """Endpoint para verificar el estado del servidor."""
     return {
         "status": "ok",
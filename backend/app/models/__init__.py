@@ -2,3 +2,4 @@ from .role import Role
 from .user import User
 from .session import UserSession
 from .audit import AuditLog
+from .rate_limit import RateLimitCounter
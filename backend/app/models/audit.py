@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Index
 from app.core.database import Base
 from datetime import datetime, timezone
 
 class AuditLog(Base):
+    # En PostgreSQL la tabla está particionada por mes sobre created_at y su
+    # clave primaria es (id, created_at); ver migración d7e3a1b5c902.
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -14,4 +16,12 @@ class AuditLog(Base):
     new_values = Column(JSON, nullable=True)
     ip_address = Column(String(50), nullable=True)
     user_agent = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Paginación keyset por (created_at, id)
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        # Historial de una entidad y actividad de un usuario por recencia
+        Index("ix_audit_logs_entity", "entity_name", "entity_id", "created_at"),
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+    )
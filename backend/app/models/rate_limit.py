@@ -0,0 +1,13 @@
+"""
+Contadores compartidos del limitador de intentos de login/registro.
+"""
+from sqlalchemy import BigInteger, Column, Integer, String
+from app.core.database import Base
+
+class RateLimitCounter(Base):
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String(255), primary_key=True)
+    # Inicio de la ventana en segundos epoch (múltiplo de la duración de la ventana)
+    window_start = Column(BigInteger, primary_key=True)
+    hits = Column(Integer, nullable=False, default=0)
@@ -1,7 +1,7 @@
 """
 Modelo de base de datos para las Sesiones de Usuario.
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime, timezone
@@ -11,11 +11,34 @@ class UserSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    refresh_token = Column(String(500), unique=True, index=True, nullable=False)
+    # SHA-256 del refresh token; el token en claro no se guarda
+    refresh_token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)
     device_info = Column(String, nullable=True)
     ip_address = Column(String, nullable=True)
     expires_at = Column(DateTime, nullable=False)
     is_revoked = Column(Boolean, default=False)
+    revoked_at = Column(DateTime, nullable=True)
+    # Último uso; se escribe agrupado desde app.core.session_activity
+    last_seen_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     user = relationship("User", back_populates="sessions")
+
+    __table_args__ = (
+        # Listado y paginación keyset de las sesiones activas de un usuario
+        Index(
+            "ix_user_sessions_active_user_id_id",
+            "user_id",
+            "id",
+            postgresql_where=text("NOT is_revoked"),
+            sqlite_where=text("NOT is_revoked"),
+        ),
+        # Compactación: sesiones caducadas y revocadas
+        Index("ix_user_sessions_expires_at", "expires_at"),
+        Index(
+            "ix_user_sessions_revoked_at",
+            "revoked_at",
+            postgresql_where=text("is_revoked"),
+            sqlite_where=text("is_revoked"),
+        ),
+    )
@@ -1,7 +1,7 @@
 """ 
 Modelo de base de datos para los Usuarios del sistema. 
 """ 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date 
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date, Index, func
 from sqlalchemy.orm import relationship 
 from app.core.database import Base 
 from datetime import datetime, timezone 
@@ -10,7 +10,8 @@ class User(Base):
     __tablename__ = "users" 
 
     id = Column(Integer, primary_key=True, index=True) 
-    email = Column(String(255), unique=True, index=True, nullable=False) 
+    # Único sin distinguir mayúsculas: índice funcional sobre lower(email)
+    email = Column(String(255), nullable=False)
     hashed_password = Column(String(255), nullable=False) 
     
     # Nuevos campos de perfil 
@@ -40,3 +41,7 @@ class User(Base):
     
     # Relación con Sesiones
     sessions = relationship("UserSession", back_populates="user", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("uq_users_email_lower", func.lower(email), unique=True),
+    )
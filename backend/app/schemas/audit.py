@@ -15,3 +15,13 @@ class AuditLogResponse(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class AuditLogFilter(BaseModel):
+    """Filtros de búsqueda de auditoría; `created_from` incluido, `created_to` excluido."""
+    user_id: Optional[int] = None
+    action: Optional[str] = None
+    entity_name: Optional[str] = None
+    entity_id: Optional[int] = None
+    ip_address: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
@@ -8,16 +8,18 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: str | None = None
+    sid: int | None = None
+    type: str | None = None
 
 class SessionResponse(BaseModel):
     id: int
     user_id: int
-    refresh_token: str
     device_info: str | None
     ip_address: str | None
     expires_at: datetime
     is_revoked: bool
     created_at: datetime
+    last_seen_at: datetime | None = None
 
     class Config:
         from_attributes = True
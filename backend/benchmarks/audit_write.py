@@ -0,0 +1,75 @@
+"""
+Benchmark: latencia de endpoints que escriben auditoría.
+
+Mide PUT /users/{id} y POST /auth/register. Ejecutar una vez con
+AUDIT_WRITE_MODE=durable y otra con AUDIT_WRITE_MODE=buffered en el servidor y
+comparar. El limitador de intentos rechazaría los registros a partir del sexto
+por minuto desde la misma IP, así que el servidor debe arrancarse con
+RATE_LIMIT_ENABLED=false:
+
+    python -m benchmarks.audit_write --url http://localhost:8000 --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import login, percentile
+
+
+async def measure(name: str, calls, concurrency: int) -> None:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(call):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code == 429:
+                raise SystemExit("El limitador de intentos está activo: arrancar el servidor con RATE_LIMIT_ENABLED=false")
+            response.raise_for_status()
+
+    await asyncio.gather(*(one(call) for call in calls))
+    print(f"{name:<22} n={len(latencies)} p50={percentile(latencies, 50):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms")
+
+
+async def run(url: str, requests: int, concurrency: int, email: str, password: str) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        headers = {"Authorization": f"Bearer {await login(client, email, password)}"}
+        target = await client.post("/api/v1/users/", headers=headers, json={
+            "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            "password": "BenchPassword123!",
+            "first_name": "Bench",
+            "last_name": "Target",
+        })
+        target.raise_for_status()
+        user_id = target.json()["id"]
+
+        await measure("PUT /users/{id}", [
+            (lambda i=i: client.put(f"/api/v1/users/{user_id}", headers=headers, json={"first_name": f"Bench{i}"}))
+            for i in range(requests)
+        ], concurrency)
+        await measure("POST /auth/register", [
+            (lambda: client.post("/api/v1/auth/register", json={
+                "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+                "password": "BenchPassword123!",
+                "first_name": "Bench",
+                "last_name": "User",
+            }))
+            for _ in range(requests)
+        ], concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--email", default="admin@empresa.com")
+    parser.add_argument("--password", default="AdminSystem_2024!")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.email, args.password))
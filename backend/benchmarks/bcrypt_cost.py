@@ -0,0 +1,31 @@
+"""
+Benchmark: tiempo de un hash bcrypt por coste (rondas) en esta máquina.
+
+Muestra los milisegundos de cada coste y el que elegiría la calibración de
+arranque para el objetivo dado:
+
+    python -m benchmarks.bcrypt_cost --min-rounds 10 --max-rounds 14 --target-ms 250
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.hashing import calibrate_bcrypt_rounds, time_bcrypt
+
+
+def run(min_rounds: int, max_rounds: int, samples: int, target_ms: float) -> None:
+    chosen, _ = calibrate_bcrypt_rounds(target_ms, min_rounds, max_rounds)
+    print(f"objetivo={target_ms:.0f} ms muestras={samples}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = time_bcrypt(rounds, samples)
+        marker = "  <- calibrado" if rounds == chosen else ""
+        print(f"rondas={rounds:2d} {elapsed:9.1f} ms  {1000 / elapsed:7.1f} hashes/s por núcleo{marker}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rounds", type=int, default=settings.bcrypt_min_rounds)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--target-ms", type=float, default=settings.bcrypt_target_ms)
+    args = parser.parse_args()
+    run(args.min_rounds, args.max_rounds, args.samples, args.target_ms)
@@ -0,0 +1,56 @@
+"""
+Benchmark: throughput con cientos de conexiones concurrentes.
+
+Ejecutar dos veces contra el mismo servidor, una con DATABASE_ASYNC=false y otra
+con DATABASE_ASYNC=true, y comparar peticiones/s y latencias:
+
+    python -m benchmarks.concurrency --url http://localhost:8000 --connections 500 --duration 30
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import login, percentile
+
+
+async def worker(client: httpx.AsyncClient, path: str, headers: dict, stop_at: float,
+                 latencies: list[float], statuses: Counter) -> None:
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] += 1
+
+
+async def run(url: str, path: str, connections: int, duration: float, email: str, password: str) -> None:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        headers = {"Authorization": f"Bearer {await login(client, email, password)}"}
+        latencies: list[float] = []
+        statuses: Counter = Counter()
+        started = time.perf_counter()
+        stop_at = started + duration
+        await asyncio.gather(*(
+            worker(client, path, headers, stop_at, latencies, statuses) for _ in range(connections)
+        ))
+        elapsed = time.perf_counter() - started
+
+    print(f"{path} con {connections} conexiones durante {elapsed:.1f}s")
+    print(f"  throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"  latencia p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms")
+    print(f"  respuestas: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/users/")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--email", default="admin@empresa.com")
+    parser.add_argument("--password", default="AdminSystem_2024!")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.path, args.connections, args.duration, args.email, args.password))
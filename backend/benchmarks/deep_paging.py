@@ -0,0 +1,59 @@
+"""
+Benchmark: paginación por OFFSET vs keyset en audit_logs.
+
+Para cada profundidad mide el tiempo de leer una página con `skip` y con el
+cursor equivalente. Con OFFSET crece linealmente; con keyset es constante.
+
+Uso (contra la BD configurada en .env, con audit_logs poblada):
+    python -m benchmarks.deep_paging --depths 0 10000 100000 1000000 --limit 100
+"""
+import argparse
+import time
+
+from app.core.database import SessionLocal
+from app.crud.audit import get_audit_logs, get_audit_logs_page
+from app.crud.pagination import encode_cursor
+from app.models.audit import AuditLog
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(depths: list[int], limit: int, repeat: int) -> None:
+    db = SessionLocal()
+    try:
+        print(f"{'profundidad':>12} {'offset (ms)':>12} {'keyset (ms)':>12}")
+        for depth in depths:
+            cursor = ""
+            if depth:
+                anchor = (
+                    db.query(AuditLog.created_at, AuditLog.id)
+                    .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+                    .offset(depth - 1)
+                    .first()
+                )
+                if anchor is None:
+                    print(f"{depth:>12} (la tabla tiene menos filas)")
+                    continue
+                cursor = encode_cursor(anchor.created_at, anchor.id)
+            offset_ms = timed(lambda: get_audit_logs(db, skip=depth, limit=limit), repeat)
+            keyset_ms = timed(lambda: get_audit_logs_page(db, cursor=cursor, limit=limit), repeat)
+            print(f"{depth:>12} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.depths, args.limit, args.repeat)
@@ -0,0 +1,100 @@
+"""
+Benchmark: coste por llamada de las consultas calientes de autenticación.
+
+Compara la forma anterior (Query del ORM construida en cada llamada) con las
+sentencias construidas una sola vez que usan ahora los CRUD: principal por id,
+usuario por email y la rotación del refresh token que ejecuta /auth/refresh.
+
+Contra la BD configurada (incluye ida y vuelta y sentencias preparadas):
+    python -m benchmarks.hot_queries --iterations 5000
+
+Solo la sobrecarga de Python, con SQLite en memoria:
+    python -m benchmarks.hot_queries --database-url sqlite://
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  Registrar todas las tablas
+from app.core.config import settings
+from app.core.database import Base, engine_options
+from app.core.security import refresh_token_digest
+from app.crud.session import rotate_refresh_token
+from app.crud.user import get_principal, get_user_by_email
+from app.models.session import UserSession
+from app.models.user import User
+
+
+def per_call_us(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def legacy_principal(db, user_id):
+    return db.query(User.id, User.email, User.role_id, User.is_active).filter(User.id == user_id).first()
+
+
+def legacy_user_by_email(db, email):
+    return db.query(User).filter(User.email == email).first()
+
+
+def legacy_rotate_refresh_token(db, token, new_token, expires_at):
+    now = datetime.now(timezone.utc)
+    return db.execute(
+        update(UserSession)
+        .where(
+            UserSession.refresh_token_hash == refresh_token_digest(token),
+            UserSession.is_revoked == False,
+            UserSession.expires_at > now,
+        )
+        .values(refresh_token_hash=refresh_token_digest(new_token), expires_at=expires_at, last_seen_at=now)
+        .returning(UserSession.id, UserSession.user_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+
+def run(database_url: str, iterations: int) -> None:
+    if database_url.startswith("sqlite"):
+        engine = create_engine(database_url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(User), [{
+                "email": "bench@example.com", "hashed_password": "x", "first_name": "Bench", "last_name": "Mark",
+                "role_id": 1,
+            }])
+    else:
+        engine = create_engine(database_url, **engine_options("benchmark"))
+    db = sessionmaker(bind=engine)()
+    try:
+        user = db.query(User.id, User.email).first()
+        # Un token inexistente no actualiza ninguna fila: se mide solo la sentencia
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+        cases = [
+            ("principal por id", lambda: legacy_principal(db, user.id), lambda: get_principal(db, user.id)),
+            ("usuario por email", lambda: legacy_user_by_email(db, user.email),
+             lambda: get_user_by_email(db, user.email)),
+            ("rotar refresh token", lambda: legacy_rotate_refresh_token(db, "no-existe", "nuevo", expires_at),
+             lambda: rotate_refresh_token(db, "no-existe", "nuevo", expires_at)),
+        ]
+        print(f"{'consulta':20} {'antes µs':>10} {'ahora µs':>10} {'mejora':>8}")
+        for name, before, after in cases:
+            before_us = per_call_us(before, iterations)
+            after_us = per_call_us(after, iterations)
+            print(f"{name:20} {before_us:10.1f} {after_us:10.1f} {(1 - after_us / before_us) * 100:7.1f}%")
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.database_url, args.iterations)
@@ -0,0 +1,54 @@
+"""
+Benchmark: firma y verificación de access tokens por algoritmo.
+
+Compara HS256 con SECRET_KEY frente a ES256 y EdDSA con claves ya parseadas
+(como el registro de claves) y con la clave en PEM parseada en cada llamada:
+
+    python -m benchmarks.jwt_signing --iterations 5000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from app.core.config import settings
+from app.core.signing_keys import generate_key
+
+
+def per_second(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def run(iterations: int) -> None:
+    payload = {"sub": "1", "sid": 1, "exp": datetime.now(timezone.utc) + timedelta(hours=1)}
+    cases = [("HS256", settings.secret_key, settings.secret_key, False)]
+    for algorithm in ("ES256", "EdDSA"):
+        private_key = generate_key(algorithm)
+        cases.append((algorithm, private_key, private_key.public_key(), False))
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        cases.append((algorithm, private_pem, public_pem, True))
+
+    print(f"{'algoritmo':10} {'clave':10} {'firmas/s':>10} {'verificaciones/s':>17}")
+    for algorithm, signing_key, verifying_key, pem in cases:
+        token = jwt.encode(payload, signing_key, algorithm=algorithm)
+        signs = per_second(lambda: jwt.encode(payload, signing_key, algorithm=algorithm), iterations)
+        verifies = per_second(lambda: jwt.decode(token, verifying_key, algorithms=[algorithm]), iterations)
+        kind = "PEM" if pem else ("secreto" if algorithm == "HS256" else "parseada")
+        print(f"{algorithm:10} {kind:10} {signs:10.0f} {verifies:17.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -0,0 +1,96 @@
+"""
+Benchmark: serialización de páginas de auditoría de 1k y 10k filas.
+
+Compara, sobre SQLite en memoria y sin servidor:
+- antes: objetos ORM validados contra el response_model del endpoint
+  (Union[List, Page]) con from_attributes y volcados por pydantic;
+- ahora: filas con solo las columnas del schema volcadas con orjson, y el
+  TypeAdapter construido una vez (camino sin orjson).
+
+    python -m benchmarks.list_serialization --rows 1000 10000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List, Union
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  Registrar todas las tablas
+from app.api import fast_json
+from app.api.fast_json import ListSerializer
+from app.core.database import Base
+from app.crud.audit import get_audit_logs
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLogResponse
+from app.schemas.pagination import Page
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: list[int], repeat: int) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog), [
+            {
+                "user_id": n % 50, "action": "UPDATE", "entity_name": "User", "entity_id": n,
+                "old_values": {"email": f"u{n}@example.com", "first_name": "Ana", "role_id": 5},
+                "new_values": {"email": f"n{n}@example.com", "first_name": "Ana", "role_id": 4},
+                "ip_address": "10.0.0.1", "user_agent": "Mozilla/5.0", "created_at": now + timedelta(seconds=n),
+            }
+            for n in range(max(sizes))
+        ])
+    db = sessionmaker(bind=engine)()
+    response_model = TypeAdapter(Union[List[AuditLogResponse], Page[AuditLogResponse]])
+    serializer = ListSerializer(AuditLogResponse)
+    columns = serializer.columns(AuditLog)
+    orjson = fast_json.orjson
+
+    print(f"{'filas':>6} {'caso':32} {'consulta+JSON ms':>17} {'solo JSON ms':>13}")
+    try:
+        for size in sizes:
+            objects = get_audit_logs(db, limit=size)
+            rows = get_audit_logs(db, limit=size, columns=columns)
+
+            def before_json():
+                return response_model.dump_json(response_model.validate_python(objects, from_attributes=True))
+
+            def before():
+                db.expunge_all()
+                objs = get_audit_logs(db, limit=size)
+                return response_model.dump_json(response_model.validate_python(objs, from_attributes=True))
+
+            def after():
+                return serializer.dump_list(get_audit_logs(db, limit=size, columns=columns))
+
+            cases = [("ORM + response_model", before, before_json)]
+            fast_json.orjson = orjson
+            cases.append(("columnas + orjson", after, lambda: serializer.dump_list(rows)))
+            for name, full, only_json in cases:
+                print(f"{size:>6} {name:32} {best_ms(full, repeat):17.1f} {best_ms(only_json, repeat):13.1f}")
+            fast_json.orjson = None
+            print(f"{size:>6} {'columnas + TypeAdapter':32} {best_ms(after, repeat):17.1f} "
+                  f"{best_ms(lambda: serializer.dump_list(rows), repeat):13.1f}")
+            fast_json.orjson = orjson
+    finally:
+        fast_json.orjson = orjson
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
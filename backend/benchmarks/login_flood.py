@@ -0,0 +1,74 @@
+"""
+Benchmark: latencia de otras rutas durante una avalancha de logins.
+
+Lanza N clientes concurrentes contra /auth/login/access-token y, en paralelo, mide
+la latencia de /health-check. Con bcrypt en el threadpool el p99 del health-check
+se dispara; con el pool de procesos debe mantenerse estable y los logins sobrantes
+reciben 503 rápidos.
+
+Todos los logins salen de la misma IP y van al mismo email, así que el limitador
+de intentos los cortaría con 429 antes de llegar a bcrypt. Para medir el pool hay
+que arrancar el servidor con RATE_LIMIT_ENABLED=false; los 429 se cuentan aparte.
+
+Uso (con el servidor levantado):
+    python -m benchmarks.login_flood --url http://localhost:8000 --concurrency 200 --duration 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import percentile
+
+
+async def flood_login(client: httpx.AsyncClient, stop_at: float, statuses: Counter, email: str, password: str) -> None:
+    while time.perf_counter() < stop_at:
+        response = await client.post(
+            "/api/v1/auth/login/access-token",
+            data={"username": email, "password": password},
+        )
+        statuses[response.status_code] += 1
+
+
+async def probe_health(client: httpx.AsyncClient, stop_at: float, latencies: list[float]) -> None:
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        await client.get("/api/v1/health-check")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def run(url: str, concurrency: int, duration: float, email: str, password: str) -> None:
+    limits = httpx.Limits(max_connections=concurrency + 10)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        baseline: list[float] = []
+        await probe_health(client, time.perf_counter() + 3, baseline)
+
+        statuses: Counter = Counter()
+        latencies: list[float] = []
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(
+            probe_health(client, stop_at, latencies),
+            *(flood_login(client, stop_at, statuses, email, password) for _ in range(concurrency)),
+        )
+
+    print(f"health-check sin carga   p50={statistics.median(baseline):.1f}ms p99={percentile(baseline, 99):.1f}ms")
+    print(f"health-check con avalancha p50={statistics.median(latencies):.1f}ms p99={percentile(latencies, 99):.1f}ms")
+    print(f"respuestas de login: {dict(statuses)}")
+    print(f"  503 del pool de bcrypt: {statuses[503]}  429 del limitador: {statuses[429]}")
+    if statuses[429]:
+        print("  Aviso: el limitador de intentos está activo (RATE_LIMIT_ENABLED=false para medir solo el pool)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--email", default="admin@empresa.com")
+    parser.add_argument("--password", default="AdminSystem_2024!")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.email, args.password))
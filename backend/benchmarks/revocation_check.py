@@ -0,0 +1,54 @@
+"""
+Benchmark: coste de comprobar la revocación de sesión frente al decode del JWT.
+
+Mide en proceso, sin servidor, el decode de un access token con y sin la
+consulta al bitset de sesiones revocadas:
+
+    python -m benchmarks.revocation_check --iterations 200000 --revoked 1000000
+"""
+import argparse
+import random
+import time
+
+import jwt
+
+from app.core.config import settings
+from app.core.revocation import RevocationSet
+from app.core.security import create_access_token
+
+
+def timed(fn, iterations: int) -> float:
+    """Microsegundos por llamada."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run(iterations: int, revoked: int) -> None:
+    revocations = RevocationSet()
+    revocations.add(*random.sample(range(revoked * 2), revoked))
+    sid = revoked * 2 - 1
+    token = create_access_token(subject=1, session_id=sid)
+
+    def decode():
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+    def decode_and_check():
+        return decode()["sid"] in revocations
+
+    decode_us = timed(decode, iterations)
+    check_us = timed(lambda: sid in revocations, iterations * 10)
+    both_us = timed(decode_and_check, iterations)
+    print(f"revocadas={revocations.count} bitset={revocations.stats()['bytes'] / 1024:.0f} KiB")
+    print(f"jwt.decode            {decode_us:8.2f} µs")
+    print(f"comprobación bitset   {check_us:8.3f} µs")
+    print(f"decode + comprobación {both_us:8.2f} µs ({(both_us / decode_us - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--revoked", type=int, default=1000000)
+    args = parser.parse_args()
+    run(args.iterations, args.revoked)
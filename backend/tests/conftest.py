@@ -0,0 +1,31 @@
+"""
+Fixtures compartidas de las pruebas.
+"""
+from contextlib import contextmanager
+import pytest
+from app.core.query_stats import RequestQueryStats, add_observer, remove_observer
+
+@pytest.fixture
+def query_budget():
+    """
+    Presupuesto de consultas SQL por bloque de peticiones:
+
+        with query_budget(3):
+            client.post("/api/v1/users/", json=...)
+
+    Falla si las peticiones del bloque ejecutan más de 3 sentencias. Solo cuenta
+    los engines instrumentados (`instrument_engine`).
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        recorded: list[RequestQueryStats] = []
+        add_observer(recorded.append)
+        try:
+            yield recorded
+        finally:
+            remove_observer(recorded.append)
+        used = sum(stats.count for stats in recorded)
+        detail = ", ".join(f"{stats.method} {stats.path}: {stats.count}" for stats in recorded)
+        assert used <= max_queries, f"{used} consultas SQL superan el presupuesto de {max_queries} ({detail})"
+
+    return budget
@@ -0,0 +1,125 @@
+"""
+Pruebas para el buffer de escritura de auditoría.
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.audit_buffer import AuditBuffer
+from app.models.audit import AuditLog
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def make_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+def audit_row(entity_id: int) -> dict:
+    return {"user_id": 1, "action": "UPDATE", "entity_name": "User", "entity_id": entity_id}
+
+def test_audit_buffer_flushes_in_bulk(tmp_path) -> None:
+    """Las entradas encoladas se escriben en un único lote al vaciar."""
+    session_factory = make_session_factory(tmp_path)
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=100, session_factory=session_factory)
+    try:
+        for entity_id in range(10):
+            assert buffer.enqueue(audit_row(entity_id))
+    finally:
+        buffer.stop()
+
+    with session_factory() as db:
+        assert db.query(AuditLog).count() == 10
+    assert buffer.batches == 1
+    assert buffer.flushed_rows == 10
+
+def test_audit_buffer_rejects_when_full(tmp_path) -> None:
+    """Con el buffer lleno enqueue devuelve False para escribir en modo durable."""
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=2, session_factory=make_session_factory(tmp_path))
+    try:
+        assert buffer.enqueue(audit_row(1))
+        assert buffer.enqueue(audit_row(2))
+        assert not buffer.enqueue(audit_row(3))
+        assert buffer.fallbacks == 1
+    finally:
+        buffer.stop()
+
+def test_audit_buffer_keeps_rows_while_database_is_down(tmp_path) -> None:
+    """Con la BD caída el lote vuelve a la cola sin gastar intentos y lo nuevo pasa a modo durable."""
+    session_factory = make_session_factory(tmp_path)
+    down = [True]
+
+    def flaky_factory():
+        if down[0]:
+            raise OperationalError("INSERT", {}, Exception("BD no disponible"))
+        return session_factory()
+
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=2, max_attempts=1, session_factory=flaky_factory)
+    buffer.start()
+    try:
+        assert buffer.enqueue(audit_row(1))
+        assert buffer.enqueue(audit_row(2))
+        assert buffer.flush() == 0
+        assert buffer.flush() == 0
+        assert buffer.failures == 2
+        assert buffer.stats()["pending"] == 2
+        assert not buffer.enqueue(audit_row(3))
+        down[0] = False
+    finally:
+        buffer.stop()
+
+    assert buffer.dropped == 0
+    with session_factory() as db:
+        assert db.query(AuditLog).count() == 2
+
+def test_audit_buffer_isolates_and_drops_bad_rows(tmp_path) -> None:
+    """Una fila inválida no bloquea el lote: las demás se escriben y ella se descarta tras N intentos."""
+    session_factory = make_session_factory(tmp_path)
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=10, max_attempts=2, session_factory=session_factory)
+    try:
+        buffer.enqueue(audit_row(1))
+        buffer.enqueue({**audit_row(2), "user_id": None})  # Viola NOT NULL
+        buffer.enqueue(audit_row(3))
+        assert buffer.flush() == 2
+        assert buffer.stats()["pending"] == 1
+        assert buffer.flush() == 0
+        assert buffer.stats()["pending"] == 0
+        assert buffer.dropped == 1
+    finally:
+        buffer.stop()
+
+    with session_factory() as db:
+        assert sorted(log.entity_id for log in db.query(AuditLog)) == [1, 3]
+
+def test_audit_buffer_rejects_after_stop(tmp_path) -> None:
+    """Tras stop() enqueue no rearranca el hilo y devuelve False."""
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=10, session_factory=make_session_factory(tmp_path))
+    buffer.stop()
+    assert not buffer.enqueue(audit_row(1))
+    assert buffer._task is None
+    assert buffer.stats()["pending"] == 0
+
+def test_buffered_audit_waits_for_commit(tmp_path, monkeypatch) -> None:
+    """En modo buffered la entrada solo se encola si la unidad de trabajo se confirma."""
+    from app.core.config import settings
+    from app.core.database import UNIT_OF_WORK
+    from app.crud import audit as audit_crud
+
+    session_factory = make_session_factory(tmp_path)
+    buffer = AuditBuffer(flush_size=100, flush_interval=60, max_pending=10, session_factory=session_factory)
+    monkeypatch.setattr(audit_crud, "audit_buffer", buffer)
+    monkeypatch.setattr(settings, "audit_write_mode", "buffered")
+    try:
+        with session_factory(info={UNIT_OF_WORK: True}) as db:
+            db.execute(text("SELECT 1"))  # El cambio auditado abre la transacción
+            audit_crud.create_audit_log(db, 1, "UPDATE", "User", 1)
+            db.rollback()
+            assert buffer.stats()["pending"] == 0
+            db.execute(text("SELECT 1"))
+            audit_crud.create_audit_log(db, 1, "UPDATE", "User", 2)
+            db.commit()
+            assert buffer.stats()["pending"] == 1
+    finally:
+        buffer.stop()
+
+    with session_factory() as db:
+        assert [log.entity_id for log in db.query(AuditLog)] == [2]
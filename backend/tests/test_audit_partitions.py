@@ -0,0 +1,16 @@
+"""
+Pruebas para el mantenimiento de particiones de audit_logs.
+"""
+from datetime import date
+from app.db.audit_partitions import PARTITION_NAME, _add_months
+
+def test_add_months_crosses_years() -> None:
+    """El cálculo de meses devuelve siempre el primer día y cruza años."""
+    assert _add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert _add_months(date(2026, 1, 1), -12) == date(2025, 1, 1)
+    assert _add_months(date(2026, 3, 1), -3) == date(2025, 12, 1)
+
+def test_partition_name_pattern() -> None:
+    """Solo las particiones mensuales cuentan para la retención, no la DEFAULT."""
+    assert PARTITION_NAME.match("audit_logs_y2026m02").groups() == ("2026", "02")
+    assert PARTITION_NAME.match("audit_logs_default") is None
@@ -0,0 +1,50 @@
+"""
+Pruebas para los filtros y la exportación de auditoría.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.crud.audit import get_audit_logs, iter_audit_logs
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLogFilter
+import app.models  # noqa: F401  Registrar todas las tablas
+
+START = datetime(2026, 1, 1)
+
+def make_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(AuditLog), [
+        {
+            "user_id": 1 + index % 2,
+            "action": "UPDATE" if index % 3 else "DELETE",
+            "entity_name": "User",
+            "entity_id": index,
+            "ip_address": "10.0.0.1",
+            "created_at": START + timedelta(days=index),
+        }
+        for index in range(30)
+    ])
+    db.commit()
+    return db
+
+def test_audit_filters_combine(tmp_path) -> None:
+    """Los filtros se combinan con AND y el rango de fechas excluye el extremo final."""
+    db = make_session(tmp_path)
+    filters = AuditLogFilter(
+        user_id=1,
+        action="UPDATE",
+        created_from=START,
+        created_to=(START + timedelta(days=10)).replace(tzinfo=timezone.utc),
+    )
+    logs = get_audit_logs(db, limit=100, filters=filters)
+    assert sorted(log.entity_id for log in logs) == [2, 4, 8]
+
+def test_iter_audit_logs_streams_all_rows(tmp_path) -> None:
+    """El iterador de exportación recorre todas las filas en orden descendente."""
+    db = make_session(tmp_path)
+    rows = list(iter_audit_logs(db, AuditLogFilter(entity_id=None), batch_size=7))
+    assert len(rows) == 30
+    assert rows[0]["entity_id"] == 29 and rows[-1]["entity_id"] == 0
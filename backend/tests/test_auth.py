@@ -44,5 +44,5 @@ def test_get_user_sessions() -> None:
     sessions = response.json()
     assert isinstance(sessions, list)
     assert len(sessions) > 0
-    assert "refresh_token" in sessions[0]
+    assert "refresh_token" not in sessions[0]
     assert "ip_address" in sessions[0]
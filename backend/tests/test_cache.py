@@ -0,0 +1,50 @@
+"""
+Pruebas unitarias para la caché en memoria de principals.
+"""
+import time
+from app.core.cache import Principal, TTLCache, principal_cache
+from app.core.invalidation import dispatch, _payloads
+
+def test_ttl_cache_hits_and_misses() -> None:
+    """Valida los contadores y la invalidación explícita."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    principal = Principal(id=1, email="admin@empresa.com", role_id=1, is_active=True)
+
+    assert cache.get(1) is None
+    cache.set(1, principal)
+    assert cache.get(1) == principal
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+def test_ttl_cache_evicts_lru_and_expired() -> None:
+    """Valida el desalojo LRU por tamaño y la expiración por TTL."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+
+    short = TTLCache(maxsize=2, ttl=0.01)
+    short.set(1, "a")
+    time.sleep(0.02)
+    assert short.get(1) is None
+
+def test_invalidation_payload_evicts_principal() -> None:
+    """Un aviso del canal de otro worker desaloja al usuario de la caché local."""
+    principal_cache.set(41, Principal(id=41, email="a@b.com", role_id=5, is_active=True))
+    principal_cache.set(42, Principal(id=42, email="c@d.com", role_id=5, is_active=True))
+    dispatch("user:41,42")
+    assert principal_cache.get(41) is None
+    assert principal_cache.get(42) is None
+
+def test_invalidation_payloads_are_chunked() -> None:
+    """Los lotes grandes se dividen para respetar el límite de NOTIFY."""
+    payloads = _payloads("session", [str(i) for i in range(5000)])
+    assert len(payloads) > 1
+    assert all(len(p) < 8000 for p in payloads)
+    assert sum(len(p.split(":", 1)[1].split(",")) for p in payloads) == 5000
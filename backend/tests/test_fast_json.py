@@ -0,0 +1,70 @@
+"""
+Pruebas para la serialización rápida de listados.
+"""
+import json
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.api import fast_json
+from app.api.fast_json import ListSerializer
+from app.core.database import Base
+from app.crud.audit import get_audit_logs_page
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLogResponse
+from app.schemas.pagination import Page
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def test_projected_rows_match_response_model(tmp_path, monkeypatch) -> None:
+    """orjson y el TypeAdapter producen el mismo JSON que validar con response_model."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fast.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(AuditLog), [
+        {"id": n, "user_id": 1, "action": "UPDATE", "entity_name": "User", "entity_id": n,
+         "old_values": {"email": "a@x.com", "tags": [1, 2]}, "new_values": None, "ip_address": "127.0.0.1",
+         "created_at": datetime(2026, 1, 2, 3, 4, 5, n)}
+        for n in range(1, 4)
+    ])
+    serializer = ListSerializer(AuditLogResponse)
+    rows, next_cursor = get_audit_logs_page(db, limit=2, columns=serializer.columns(AuditLog))
+    orm_rows, _ = get_audit_logs_page(db, limit=2)
+    expected = Page[AuditLogResponse](items=orm_rows, next_cursor=next_cursor).model_dump(mode="json")
+
+    fast = serializer.dump_page(rows, next_cursor)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    fallback = serializer.dump_page(rows, next_cursor)
+
+    assert json.loads(fast) == json.loads(fallback) == expected
+    assert json.loads(serializer.dump_list(rows)) == expected["items"]
+    db.close()
+
+def test_sparse_fieldsets_select_only_requested_columns(tmp_path, monkeypatch) -> None:
+    """`fields` recorta la consulta y la respuesta; el cursor añade sus columnas."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sparse.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(AuditLog), [
+        {"id": n, "user_id": 1, "action": "CREATE", "entity_name": "User", "entity_id": n,
+         "new_values": {"email": f"u{n}@x.com"}, "created_at": datetime(2026, 1, 1, 0, 0, n)}
+        for n in range(1, 4)
+    ])
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    serializer = ListSerializer(AuditLogResponse)
+
+    columns = serializer.columns(AuditLog, " action , action,entity_id", required=("created_at", "id"))
+    rows, next_cursor = get_audit_logs_page(db, limit=2, columns=columns)
+    assert "new_values" not in statements[-1] and "user_agent" not in statements[-1]
+    page = json.loads(serializer.dump_page(rows, next_cursor))
+    assert page["items"][0] == {"action": "CREATE", "entity_id": 3, "created_at": "2026-01-01T00:00:03", "id": 3}
+    assert page["next_cursor"] == next_cursor
+
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert json.loads(serializer.dump_page(rows, next_cursor)) == page
+
+    with pytest.raises(HTTPException) as exc:
+        serializer.columns(AuditLog, "id,hashed_password")
+    assert exc.value.status_code == 400 and "hashed_password" in exc.value.detail
+    db.close()
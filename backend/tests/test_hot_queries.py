@@ -0,0 +1,35 @@
+"""
+Pruebas para las consultas calientes construidas una sola vez.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.crud.session import create_user_session, rotate_refresh_token
+from app.crud.user import get_principal, get_user_by_email
+from app.models.user import User
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def test_cached_statements_bind_fresh_parameters(tmp_path) -> None:
+    """Las sentencias reutilizadas devuelven el resultado de los parámetros de cada llamada."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'hot.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(User), [
+        {"id": n, "email": f"u{n}@example.com", "hashed_password": "x", "first_name": "U", "last_name": "N",
+         "role_id": 5}
+        for n in (1, 2)
+    ])
+    create_user_session(db, user_id=2, refresh_token="viejo")
+
+    assert get_principal(db, 1).email == "u1@example.com"
+    assert get_principal(db, 2).email == "u2@example.com"
+    assert get_principal(db, 3) is None
+    assert get_user_by_email(db, "u2@example.com").id == 2
+    assert get_user_by_email(db, "nadie@example.com") is None
+
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    assert rotate_refresh_token(db, "viejo", "nuevo", expires_at)[1] == 2
+    assert rotate_refresh_token(db, "viejo", "otro", expires_at) is None
+    assert rotate_refresh_token(db, "nuevo", "otro", expires_at)[1] == 2
+    db.close()
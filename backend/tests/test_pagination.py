@@ -0,0 +1,18 @@
+"""
+Pruebas para los cursores de paginación keyset.
+"""
+from datetime import datetime
+import pytest
+from app.crud.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+def test_cursor_roundtrip() -> None:
+    """El cursor conserva los valores de la clave de orden."""
+    created_at = datetime(2026, 2, 27, 19, 51, 19, 402699)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor, datetime, int) == (created_at, 42)
+
+@pytest.mark.parametrize("cursor", ["zzz", encode_cursor(1, 2), encode_cursor("no-es-fecha", 1)])
+def test_invalid_cursor(cursor: str) -> None:
+    """Cursores corruptos o de otra forma se rechazan con InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, datetime, int)
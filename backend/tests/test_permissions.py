@@ -0,0 +1,33 @@
+"""
+Pruebas para el registro de permisos por nivel de rol.
+"""
+from app.core.permissions import Permission, PermissionRegistry, compile_role
+
+def make_registry() -> PermissionRegistry:
+    registry = PermissionRegistry()
+    registry._roles = {role_id: compile_role(role_id, level) for role_id, level in [(1, 1), (2, 2), (3, 3), (5, 5)]}
+    return registry
+
+def test_role_masks_follow_levels() -> None:
+    """Cada rol recibe los permisos cuyo nivel mínimo alcanza."""
+    registry = make_registry()
+    assert registry.has(1, Permission.AUDIT_READ | Permission.USERS_WRITE)
+    assert registry.has(2, Permission.USERS_READ | Permission.USERS_DELETE)
+    assert not registry.has(2, Permission.AUDIT_READ)
+    assert not registry.has(5, Permission.USERS_READ)
+
+def test_unknown_or_unloaded_roles_are_denied() -> None:
+    """Sin registro cargado o con un rol desconocido se deniega todo."""
+    assert not PermissionRegistry().has(1, Permission.USERS_READ)
+    assert not make_registry().has(99, Permission.USERS_READ)
+    assert not make_registry().can_manage(99, 5)
+
+def test_admin_cannot_manage_super_admin() -> None:
+    """Se gestiona a usuarios del mismo nivel o inferior, nunca superior."""
+    registry = make_registry()
+    assert registry.can_manage(1, 1)
+    assert registry.can_manage(2, 2)
+    assert registry.can_manage(2, 5)
+    assert not registry.can_manage(2, 1)
+    assert registry.roles_above(2) == [1]
+    assert registry.roles_above(1) == []
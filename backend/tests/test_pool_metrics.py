@@ -0,0 +1,29 @@
+"""
+Pruebas para las métricas del pool de conexiones.
+"""
+from sqlalchemy import create_engine, text
+from app.core.pool_metrics import PoolMetrics, timed_pool_class
+
+def test_pool_metrics_track_checkouts(tmp_path) -> None:
+    """Valida que se registren esperas, conexiones en uso y el estado del pool."""
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=timed_pool_class(metrics),
+        pool_size=2,
+        max_overflow=1,
+    )
+    metrics.attach(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert metrics.in_use == 1
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["in_use"] == 0
+    assert snapshot["connects"] == 1
+    assert snapshot["pool_size"] == 2
+    assert snapshot["wait_ms"]["max"] >= 0
@@ -0,0 +1,41 @@
+"""
+Pruebas para la instrumentación SQL por petición.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.core.query_stats import RequestQueryStats, instrument_engine
+from app.main import app
+
+def test_repeated_statements_are_grouped() -> None:
+    """Sentencias iguales salvo espacios cuentan juntas para detectar N+1."""
+    stats = RequestQueryStats("GET", "/api/v1/users/")
+    for _ in range(3):
+        stats.record("SELECT * FROM roles\n  WHERE id = ?", 1.0)
+    stats.record("SELECT * FROM users", 1.0)
+    assert stats.count == 4
+    assert stats.repeated(3) == [("SELECT * FROM roles WHERE id = ?", 3)]
+
+def test_slow_statements_are_recorded() -> None:
+    """Las sentencias por encima del umbral se guardan como lentas."""
+    stats = RequestQueryStats("GET", "/x")
+    stats.record("SELECT pg_sleep(1)", 10_000.0)
+    assert stats.slow == [("SELECT pg_sleep(1)", 10_000.0)]
+
+def test_server_timing_header(query_budget) -> None:
+    """Toda respuesta HTTP lleva Server-Timing con el tiempo y número de consultas."""
+    with query_budget(0) as recorded:
+        response = TestClient(app).get("/api/v1/health-check")
+    assert response.headers["server-timing"].startswith('db;dur=0.0;desc="0 queries", app;dur=')
+    assert [(stats.method, stats.path) for stats in recorded] == [("GET", "/api/v1/health-check")]
+
+def test_failed_statement_does_not_leave_start_time() -> None:
+    """Una sentencia que falla no deja su instante de inicio en la conexión."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_existe"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
@@ -0,0 +1,73 @@
+"""
+Pruebas para el limitador de intentos de login/registro.
+"""
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.rate_limit import MemoryBackend, PostgresBackend, RateLimiter, RateLimitExceeded, Rule
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def test_memory_backend_rejects_over_limit() -> None:
+    """Superado el límite por IP se rechaza con Retry-After sin afectar a otras IPs."""
+    limiter = RateLimiter(MemoryBackend())
+    rule = Rule("login_ip", limit=3, window=60)
+    for _ in range(3):
+        limiter.hit([(rule, "10.0.0.1")])
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.hit([(rule, "10.0.0.1")])
+    assert 0 < exc.value.retry_after <= 60
+    limiter.hit([(rule, "10.0.0.2")])
+    assert limiter.stats()["allowed"] == 4
+    assert limiter.stats()["rejected_by_rule"] == {"login_ip": 1}
+
+def test_previous_window_weighs_in() -> None:
+    """La ventana anterior cuenta en proporción al tiempo que queda de ella."""
+    backend = MemoryBackend()
+    for _ in range(5):
+        backend.hit("k", 60, 119.0)
+    assert backend.hit("k", 60, 120.0) == (1, 5)
+    # Dos ventanas después ya no queda nada de la anterior
+    assert backend.hit("k", 60, 300.0) == (1, 0)
+
+def test_memory_backend_is_bounded() -> None:
+    backend = MemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.hit(key, 60, 0.0)
+    assert list(backend._counters) == ["b", "c"]
+
+def test_counter_keys_have_fixed_length() -> None:
+    """Un email muy largo se cuenta con una clave que cabe en VARCHAR(255)."""
+    limiter = RateLimiter(MemoryBackend())
+    rule = Rule("login_email", limit=3, window=900)
+    limiter.hit([(rule, "a" * 1000 + "@example.com")])
+    (key,) = limiter.backend._counters
+    assert key.startswith("login_email:") and len(key) < 255
+
+def test_shared_backend_counts_across_limiters(tmp_path, monkeypatch) -> None:
+    """Dos workers con el backend compartido suman sus intentos en la misma fila."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'rate.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    first = RateLimiter(PostgresBackend(session_factory))
+    second = RateLimiter(PostgresBackend(session_factory))
+    rule = Rule("login_email", limit=2, window=900)
+    first.hit([(rule, "a@example.com")])
+    second.hit([(rule, "a@example.com")])
+    with pytest.raises(RateLimitExceeded):
+        first.hit([(rule, "a@example.com")])
+
+    later = time.time() + 3600
+    monkeypatch.setattr("app.core.rate_limit.time.time", lambda: later)
+    first.backend.cleanup()
+    with session_factory() as db:
+        assert db.query(app.models.RateLimitCounter).count() == 0
+
+def test_disabled_limiter_lets_everything_through(monkeypatch) -> None:
+    monkeypatch.setattr("app.core.rate_limit.settings.rate_limit_enabled", False)
+    limiter = RateLimiter(MemoryBackend())
+    rule = Rule("register_ip", limit=0, window=60)
+    asyncio.run(limiter.check([(rule, "10.0.0.1")]))
+    assert limiter.stats()["allowed"] == 0
@@ -0,0 +1,28 @@
+"""
+Pruebas para el enrutado de lecturas a réplicas.
+"""
+import time
+from app.core.config import settings
+from app.core.replicas import ReplicaRouter
+
+def test_replica_router_skips_lagging_replicas(tmp_path) -> None:
+    """Solo se eligen réplicas medidas recientemente y por debajo del umbral."""
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"])
+    lagging, fresh = router.replicas
+
+    # Sin medición todavía: todo al primario
+    assert router.choose() is None
+
+    now = time.monotonic()
+    lagging.lag_seconds, lagging.checked_at = settings.replica_max_lag_seconds + 1, now
+    fresh.lag_seconds, fresh.checked_at = 0.0, now
+    assert router.choose() is fresh
+    assert router.choose() is fresh
+    assert router.choose(force_primary=True) is None
+    assert router.reads_replica == 2
+    assert router.reads_primary == 2
+
+def test_replica_router_without_replicas_uses_primary() -> None:
+    """Sin réplicas configuradas todas las lecturas van al primario."""
+    router = ReplicaRouter([])
+    assert router.choose() is None
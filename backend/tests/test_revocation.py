@@ -0,0 +1,67 @@
+"""
+Pruebas para el conjunto en memoria de sesiones revocadas.
+"""
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.crud.session import revoke_user_sessions
+from app.models.session import UserSession
+from app.core.revocation import RevocationSet, revoked_sessions
+from app.core.security import create_access_token, create_refresh_token
+from app.main import app
+
+def test_revocation_set_grows_and_counts() -> None:
+    """El bitset crece bajo demanda y no cuenta dos veces la misma sesión."""
+    revocations = RevocationSet()
+    revocations.add(3, 3, 1_000_003)
+    assert 3 in revocations and 1_000_003 in revocations
+    assert 4 not in revocations and 5_000_000 not in revocations and -1 not in revocations
+    assert revocations.count == 2
+
+def test_replace_drops_previous_ids() -> None:
+    """Al recargar desde la BD se descartan los ids anteriores."""
+    revocations = RevocationSet()
+    revocations.add(1, 2)
+    revocations.replace([7])
+    assert 1 not in revocations and 7 in revocations
+    assert revocations.count == 1
+
+def test_token_of_revoked_session_is_rejected() -> None:
+    """Un access token cuya sesión está revocada se rechaza sin consultar la BD."""
+    revoked_sessions.add(424242)
+    token = create_access_token(subject=1, session_id=424242)
+    response = TestClient(app).get("/api/v1/auth/sessions", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Sesión revocada"}
+
+def test_refresh_token_is_not_an_access_token() -> None:
+    """Un refresh token no tiene sid: si valiera como bearer esquivaría la revocación."""
+    token = create_refresh_token(subject=1)
+    response = TestClient(app).get("/api/v1/auth/sessions", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+def test_bulk_revoke_is_one_update(tmp_path) -> None:
+    """Revocar todas las sesiones menos la actual es un único UPDATE y actualiza el bitset."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    future = datetime.utcnow() + timedelta(days=1)
+    with session_factory() as db:
+        db.execute(insert(UserSession), [
+            {"id": 900 + index, "user_id": 1 if index < 4 else 2, "refresh_token_hash": bytes([index]) * 32,
+             "expires_at": future, "is_revoked": False}
+            for index in range(5)
+        ])
+        db.commit()
+    updates = []
+    event.listen(engine, "before_cursor_execute", lambda *args: updates.append(args[2]) if args[2].startswith("UPDATE") else None)
+
+    with session_factory() as db:
+        revoked = revoke_user_sessions(db, user_id=1, except_session_id=900)
+
+    assert sorted(revoked) == [901, 902, 903]
+    assert len(updates) == 1
+    assert 901 in revoked_sessions and 903 in revoked_sessions
+    assert 900 not in revoked_sessions and 904 not in revoked_sessions
@@ -1,4 +1,15 @@
-from app.core.security import get_password_hash, verify_password
+import asyncio
+import pytest
+from app.core.security import (
+    pwd_context,
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    get_password_hash,
+    refresh_token_digest,
+    verify_password,
+)
+from app.core.hashing import PasswordHasher, HashingOverloadedError, calibrate_bcrypt_rounds
 
 def test_password_hashing():
     password = "secret_password"
@@ -7,3 +18,69 @@ def test_password_hashing():
     assert hashed != password
     assert verify_password(password, hashed)
     assert not verify_password("wrong_password", hashed)
+
+def test_password_hasher_process_pool():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+
+    async def scenario():
+        hashed = await hasher.hash("secret_password")
+        assert await hasher.verify("secret_password", hashed)
+        assert not await hasher.verify("wrong_password", hashed)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+
+def test_password_hasher_sheds_load_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+
+    async def scenario():
+        first = asyncio.ensure_future(hasher.hash("secret_password"))
+        await asyncio.sleep(0)
+        with pytest.raises(HashingOverloadedError):
+            await hasher.hash("secret_password")
+        await first
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    assert hasher.rejected == 1
+
+def test_refresh_token_digest_and_decode() -> None:
+    """El refresh token se identifica por un SHA-256 fijo y solo se aceptan tokens de tipo refresh."""
+    first, second = create_refresh_token(subject=7), create_refresh_token(subject=7)
+    assert first != second
+    assert len(refresh_token_digest(first)) == 32
+    assert decode_refresh_token(first) == "7"
+    assert decode_refresh_token(create_access_token(subject=7)) is None
+    assert decode_refresh_token("no-es-un-jwt") is None
+
+def test_bcrypt_calibration_respects_bounds() -> None:
+    """La calibración nunca baja del mínimo y no elige un coste por encima del objetivo."""
+    rounds, timings = calibrate_bcrypt_rounds(target_ms=0.001, min_rounds=4, max_rounds=6)
+    assert rounds == 4
+    rounds, timings = calibrate_bcrypt_rounds(target_ms=60_000, min_rounds=4, max_rounds=6)
+    assert rounds == 6 and set(timings) == {4, 5, 6}
+
+def test_login_rehashes_weaker_hash() -> None:
+    """Un hash con menos rondas que el coste configurado se rehace al verificarlo."""
+    from passlib.hash import bcrypt
+    old_hash = bcrypt.using(rounds=4).hash("secret_password")
+    original = pwd_context.to_string()
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    hasher.configure(5)
+
+    async def scenario():
+        assert await hasher.verify_and_update("wrong_password", old_hash) == (False, None)
+        valid, new_hash = await hasher.verify_and_update("secret_password", old_hash)
+        assert valid and new_hash.startswith("$2b$05$")
+        assert await hasher.verify_and_update("secret_password", new_hash) == (True, None)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+        pwd_context.load(original)
+    assert hasher.rehashed == 1
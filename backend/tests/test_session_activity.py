@@ -0,0 +1,49 @@
+"""
+Pruebas para el registro agrupado de last_seen_at.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.session_activity import SessionActivity
+from app.models.session import UserSession
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def test_touches_are_coalesced_into_one_flush(tmp_path) -> None:
+    """Muchos usos de la misma sesión acaban en una sola fila del UPDATE en bloque."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'activity.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    future = datetime.utcnow() + timedelta(days=1)
+    with session_factory() as db:
+        db.execute(insert(UserSession), [
+            {"id": 1, "user_id": 1, "refresh_token_hash": b"a" * 32, "expires_at": future},
+            {"id": 2, "user_id": 1, "refresh_token_hash": b"b" * 32, "expires_at": future, "last_seen_at": future},
+        ])
+        db.commit()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    activity = SessionActivity(flush_interval=60, session_factory=session_factory)
+    try:
+        for _ in range(100):
+            activity.touch(1)
+        activity.touch(2)
+    finally:
+        activity.stop()
+
+    assert activity.stats()["flushed_rows"] == 2
+    assert len([statement for statement in statements if statement.startswith("UPDATE")]) == 1
+    with session_factory() as db:
+        first, second = db.query(UserSession).order_by(UserSession.id).all()
+        assert first.last_seen_at is not None
+        # Un valor posterior escrito por otro worker no retrocede
+        assert second.last_seen_at == future
+
+def test_touch_after_stop_does_not_restart_flusher() -> None:
+    """Tras stop() las anotaciones se ignoran y no se arranca otro hilo."""
+    activity = SessionActivity(flush_interval=60, session_factory=sessionmaker())
+    activity.stop()
+    activity.touch(1)
+    assert activity._task is None
+    assert activity.stats()["pending"] == 0
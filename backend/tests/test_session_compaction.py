@@ -0,0 +1,42 @@
+"""
+Pruebas para la compactación de sesiones.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.db.session_compaction import compact_sessions
+from app.models.session import UserSession
+import app.models  # noqa: F401  Registrar todas las tablas
+
+def test_compaction_deletes_in_batches(tmp_path) -> None:
+    """Se borran las caducadas y las revocadas antiguas; se conservan las revocadas recientes aunque hayan caducado."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    now = datetime.utcnow()
+    rows = [{"expires_at": now - timedelta(days=1)} for _ in range(5)]
+    rows.append({"expires_at": now + timedelta(days=1)})
+    rows.append({"expires_at": now + timedelta(days=1), "is_revoked": True, "revoked_at": now})
+    rows.append({"expires_at": now + timedelta(days=1), "is_revoked": True, "revoked_at": now - timedelta(days=1)})
+    # Revocada y caducada hace poco: sus access tokens aún no han expirado
+    rows.append({"expires_at": now - timedelta(minutes=1), "is_revoked": True, "revoked_at": now})
+    with session_factory() as db:
+        db.execute(insert(UserSession), [
+            {"user_id": 1, "refresh_token_hash": bytes([index]) * 32, "is_revoked": False, **row}
+            for index, row in enumerate(rows)
+        ])
+        db.commit()
+
+    report = compact_sessions(session_factory, batch_size=2, pause=0)
+
+    assert report.deleted == 6
+    assert report.batches == 4
+    assert len(report.batch_ms) == 4
+    with session_factory() as db:
+        remaining = db.query(UserSession).order_by(UserSession.id).all()
+        assert [(session.is_revoked, session.revoked_at is not None) for session in remaining] == [
+            (False, False),
+            (True, True),
+            (True, True),
+        ]
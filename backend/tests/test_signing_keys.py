@@ -0,0 +1,92 @@
+"""
+Pruebas para el registro de claves de firma JWT y el JWKS.
+"""
+import os
+import time
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from app.core.security import create_access_token, create_refresh_token, decode_access_token, decode_refresh_token
+from app.core import signing_keys
+from app.core.config import settings
+from app.core.signing_keys import key_registry, write_new_key
+from app.main import app
+
+pytest.importorskip("cryptography")
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    yield tmp_path
+    key_registry.load([])
+
+def test_tokens_carry_kid_and_rotation_keeps_old_tokens_valid(keys_dir, monkeypatch) -> None:
+    """Tras publicarse, firma la clave nueva y los tokens de la anterior siguen verificando."""
+    old_path = write_new_key(keys_dir, "ES256")
+    key_registry.load_dir(keys_dir, publish_delay=0)
+    old_token = create_access_token(subject=3, session_id=9)
+    assert jwt.get_unverified_header(old_token) == {"alg": "ES256", "kid": old_path.stem, "typ": "JWT"}
+
+    # Recién creada la clave nueva solo verifica: los consumidores aún tienen el JWKS anterior
+    published = time.time() - 3600
+    os.utime(old_path, (published, published))
+    new_path = write_new_key(keys_dir, "EdDSA")
+    key_registry.load_dir(keys_dir, publish_delay=600)
+    assert key_registry.active.kid == old_path.stem
+    assert new_path.stem in [key["kid"] for key in key_registry.jwks()["keys"]]
+
+    # Pasado el retardo de publicación firma sin necesidad de recargar
+    later = time.time() + 601
+    monkeypatch.setattr(signing_keys.time, "time", lambda: later)
+    assert key_registry.active.kid == new_path.stem > old_path.stem
+    new_token = create_access_token(subject=3)
+    assert jwt.get_unverified_header(new_token)["alg"] == "EdDSA"
+    assert decode_access_token(old_token)["sid"] == 9
+    assert decode_access_token(new_token)["sub"] == "3"
+
+    # Los refresh tokens siguen en HS256 y sin kid
+    assert decode_refresh_token(create_refresh_token(subject=3)) == "3"
+
+def test_unknown_kid_and_forged_algorithm_are_rejected(keys_dir) -> None:
+    write_new_key(keys_dir, "EdDSA")
+    key_registry.load_dir(keys_dir, publish_delay=0)
+    token = create_access_token(subject=1)
+    forged = jwt.encode({"sub": "1"}, "otra", algorithm="HS256", headers={"kid": key_registry.active.kid})
+    unknown = jwt.encode({"sub": "1"}, "otra", algorithm="HS256", headers={"kid": "no-existe"})
+    for bad in (forged, unknown):
+        with pytest.raises(jwt.InvalidTokenError):
+            decode_access_token(bad)
+    assert decode_access_token(token)["sub"] == "1"
+
+def test_jwks_lets_consumers_verify_offline(keys_dir) -> None:
+    write_new_key(keys_dir, "EdDSA")
+    key_registry.load_dir(keys_dir, publish_delay=0)
+    token = create_access_token(subject=5)
+
+    response = TestClient(app).get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    jwk_set = jwt.PyJWKSet.from_dict(response.json())
+    assert all("d" not in key for key in response.json()["keys"])
+    signing_key = jwk_set[jwt.get_unverified_header(token)["kid"]]
+    assert jwt.decode(token, signing_key.key, algorithms=["EdDSA"])["sub"] == "5"
+
+def test_active_kid_overrides_publish_delay(keys_dir) -> None:
+    """JWT_ACTIVE_KID activa una clave recién creada sin esperar."""
+    path = write_new_key(keys_dir, "EdDSA")
+    key_registry.load_dir(keys_dir, publish_delay=600)
+    assert key_registry.active is None
+    key_registry.load_dir(keys_dir, path.stem, publish_delay=600)
+    assert key_registry.active.kid == path.stem
+
+def test_kid_less_tokens_expire_after_key_registry_is_enabled(keys_dir) -> None:
+    """Los tokens HS256 sin kid solo valen la vida de un access token tras habilitar las claves."""
+    legacy = create_access_token(subject=7)
+    path = write_new_key(keys_dir, "EdDSA")
+    key_registry.load_dir(keys_dir, publish_delay=0)
+    assert decode_access_token(legacy)["sub"] == "7"
+
+    enabled_at = time.time() - settings.access_token_expire_minutes * 60 - 1
+    os.utime(path, (enabled_at, enabled_at))
+    key_registry.load_dir(keys_dir, publish_delay=0)
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(legacy)
+    assert decode_access_token(create_access_token(subject=7))["sub"] == "7"
@@ -0,0 +1,104 @@
+"""
+Pruebas de la unidad de trabajo por petición: una única transacción por
+endpoint y sin SELECT de refresco tras los INSERT.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import app.core.database as database
+import app.models  # noqa: F401  Registrar todas las tablas
+from app.api import deps
+from app.api.routers import users as users_router
+from app.core.cache import Principal
+from app.core.hashing import password_hasher
+from app.core.permissions import permission_registry
+from app.core.query_stats import instrument_engine
+from app.main import app
+from app.models.audit import AuditLog
+from app.models.role import Role
+from app.models.user import User
+
+NEW_USER = {"email": "nuevo@empresa.com", "password": "secreto123", "first_name": "Nu", "last_name": "Evo", "role_id": 5}
+
+@pytest.fixture
+def uow(tmp_path, monkeypatch):
+    """Base SQLite con roles, admin autenticado y contador de sentencias/commits."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'uow.db'}")
+    database.Base.metadata.create_all(engine)
+    instrument_engine(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        db.add_all([Role(id=1, name="Super Admin", level=1), Role(id=5, name="Visitante", level=5)])
+        db.commit()
+        permission_registry.load(db)
+
+    counts = {"statements": [], "commits": 0}
+    event.listen(engine, "before_cursor_execute", lambda *args: counts["statements"].append(args[2].split()[0]))
+    event.listen(engine, "commit", lambda conn: counts.__setitem__("commits", counts["commits"] + 1))
+
+    async def fake_hash(password: str) -> str:
+        return "hash-" + password
+
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    monkeypatch.setattr(password_hasher, "hash", fake_hash)
+    app.dependency_overrides[deps.get_current_active_principal] = lambda: Principal(
+        id=1, email="admin@empresa.com", role_id=1, is_active=True
+    )
+    try:
+        yield session_factory, counts
+    finally:
+        app.dependency_overrides.clear()
+
+def test_create_user_is_one_transaction(uow, query_budget) -> None:
+    """Crear un usuario y su auditoría cuesta dos INSERT y un commit."""
+    session_factory, counts = uow
+    with query_budget(2):
+        response = TestClient(app).post("/api/v1/users/", json=NEW_USER)
+    assert response.status_code == 200
+    assert response.json()["email"] == NEW_USER["email"]
+    assert counts["statements"] == ["INSERT", "INSERT"]
+    assert counts["commits"] == 1
+
+def test_duplicate_email_ignores_case(uow) -> None:
+    """El INSERT ... ON CONFLICT detecta el email repetido aunque cambien las mayúsculas."""
+    session_factory, counts = uow
+    client = TestClient(app)
+    assert client.post("/api/v1/users/", json=NEW_USER).status_code == 200
+    duplicate = {**NEW_USER, "email": NEW_USER["email"].upper()}
+    response = client.post("/api/v1/users/", json=duplicate)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "El email ya está registrado"
+    with session_factory() as db:
+        assert db.query(User).count() == 1
+
+def test_failed_request_rolls_back_everything(uow, monkeypatch) -> None:
+    """Si la auditoría falla, el usuario tampoco se guarda."""
+    session_factory, counts = uow
+
+    def broken_audit(*args, **kwargs):
+        raise RuntimeError("auditoría caída")
+
+    monkeypatch.setattr(users_router, "create_audit_log", broken_audit)
+    response = TestClient(app, raise_server_exceptions=False).post("/api/v1/users/", json=NEW_USER)
+    assert response.status_code == 500
+    assert counts["commits"] == 0
+    with session_factory() as db:
+        assert db.query(User).filter(User.email == NEW_USER["email"]).first() is None
+        assert db.query(AuditLog).count() == 0
+
+def test_failed_after_commit_callback_keeps_response(uow, monkeypatch) -> None:
+    """Un fallo en un efecto posterior al commit no convierte en 500 un cambio ya guardado."""
+    session_factory, counts = uow
+    original_create_user = users_router.create_user
+
+    def create_user_with_broken_callback(db, *args, **kwargs):
+        database.after_commit(db, lambda: 1 / 0)
+        return original_create_user(db, *args, **kwargs)
+
+    monkeypatch.setattr(users_router, "create_user", create_user_with_broken_callback)
+    response = TestClient(app, raise_server_exceptions=False).post("/api/v1/users/", json=NEW_USER)
+    assert response.status_code == 200
+    assert counts["commits"] == 1
+    with session_factory() as db:
+        assert db.query(User).filter(User.email == NEW_USER["email"]).count() == 1